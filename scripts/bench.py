@@ -0,0 +1,195 @@
+import argparse
+import dataclasses
+import importlib
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from itertools import accumulate
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import compact
+import paths
+import snippets
+import sync
+from output import Output
+from snippets import Snippet
+
+DEFAULT_SIZES = [1000, 10000]
+
+# Corpus shape: tag popularity follows Zipf's law, README sizes a log-normal distribution
+TAG_VOCABULARY = 300
+TAG_COUNT_WEIGHTS = [5, 30, 30, 20, 10, 5]
+DRAFT_RATIO = 0.05
+README_MEDIAN_BYTES = 2000
+README_MAX_BYTES = 1024 * 1024
+FIRST_DATE = date(2015, 1, 1)
+DAYS = 10 * 365
+
+WORDS = ("snippet code comment function type value pattern cache thread "
+         "async generic closure pointer module index query parse render").split()
+
+def generate(root: str, count: int, seed: int = 0) -> None:
+    """Generate a synthetic corpus of count snippets under root/src"""
+    line = " ".join(WORDS) + "\n"
+    for snippet, size in synthesize(count, seed):
+        created = snippet.created
+        folder = os.path.join(root, paths.SRC, str(created.year), str(created.month), str(created.day), snippet.path)
+        os.makedirs(folder)
+
+        with open(os.path.join(folder, "README.md"), "w", encoding="utf-8") as readme:
+            readme.write(f"# {snippet.title}\n\n{snippet.summary}\n\n")
+            readme.write(line * (size // len(line)))
+            readme.write("\n---\n[Home](../../../../../README.md)\n")
+
+        with open(os.path.join(folder, "tags"), "w", encoding="utf-8") as file:
+            file.write("".join(f"{tag}\n" for tag in sorted(snippet.tags)))
+
+def synthesize(count: int, seed: int = 0) -> Iterator[Tuple[Snippet, int]]:
+    """Yield count synthetic snippets with the size of their README.md, without writing them"""
+    rand = random.Random(seed)
+    tags = [f"tag-{rank}" for rank in range(1, TAG_VOCABULARY + 1)]
+    tag_weights = list(accumulate(1 / rank ** 1.1 for rank in range(1, TAG_VOCABULARY + 1)))
+
+    for i in range(count):
+        created = FIRST_DATE + timedelta(days=rand.randrange(DAYS))
+        title = " ".join(rand.choices(WORDS, k=6)).capitalize()
+        summary = " ".join(rand.choices(WORDS, k=20)).capitalize() + "."
+        size = min(int(rand.lognormvariate(math.log(README_MEDIAN_BYTES), 1)), README_MAX_BYTES)
+
+        count_of_tags = rand.choices(range(len(TAG_COUNT_WEIGHTS)), weights=TAG_COUNT_WEIGHTS)[0]
+        snippet_tags = set(rand.choices(tags, cum_weights=tag_weights, k=count_of_tags))
+        if rand.random() < DRAFT_RATIO:
+            snippet_tags.add(snippets.DRAFT_TAG)
+        yield Snippet(title, summary, created, frozenset(snippet_tags), f"snippet_{i}",
+                      snippets.DRAFT_TAG in snippet_tags), size
+
+def memory(count: int, seed: int = 0) -> Dict[str, Any]:
+    """Measure the memory taken by count snippets as Snippet and as CompactSnippet"""
+    result: Dict[str, Any] = {"snippets": count}
+    for name, build in (("snippet_mb", list), ("compact_mb", compact.CompactSnippets)):
+        # both are built from the same stream, so the strings shared by them are counted in both
+        tracemalloc.start()
+        corpus = build(snippet for snippet, _ in synthesize(count, seed))
+        result[name] = round(tracemalloc.get_traced_memory()[0] / (1024 * 1024), 2)
+        tracemalloc.stop()
+        del corpus
+    return result
+
+def run(root: str, layout: sync.Layout = sync.Layout(), processes: int = 1) -> Dict[str, Any]:
+    """Time each phase of a sync of the corpus under root
+
+    If processes is more than 1, rendering with that many processes is timed
+    too, and compared to rendering serially.
+    """
+    _use_base(root)
+    phases: Dict[str, float] = {}
+
+    start = time.perf_counter()
+    all_snippets = list(snippets.get_all())
+    phases["discovery"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    all_snippets.sort(key=lambda s: s.created, reverse=True)
+    groups = sync.group(all_snippets)
+    phases["group"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    targets = sync.targets(groups, layout)
+    rendered = {path: "".join(content) for path, content in sync.render_all(targets)}
+    phases["render"] = time.perf_counter() - start
+
+    parallel = None
+    if processes > 1:
+        start = time.perf_counter()
+        rendered_in_parallel = {path: "".join(content) for path, content in sync.render_all(targets, processes)}
+        parallel = time.perf_counter() - start
+        assert rendered_in_parallel == rendered, "rendering in parallel changed the output"
+
+    start = time.perf_counter()
+    out = Output()
+    for path, content in rendered.items():
+        out.write(path, content)
+    out.prune(paths.pages(), rendered)
+    phases["write"] = time.perf_counter() - start
+
+    return {
+        "snippets": len(all_snippets),
+        "pages": len(groups.by_page),
+        "tags": len(groups.by_tag),
+        "files_written": len(out.changes),
+        "bytes_written": sum(len(content.encode("utf-8")) for content in rendered.values()),
+        "phases": phases,
+        "total": sum(phases.values()),
+        "render_processes": processes,
+        "render_parallel": parallel,
+        "render_speedup": phases["render"] / parallel if parallel else None
+    }
+
+def benchmark(
+        sizes: List[int],
+        seed: int = 0,
+        root: Optional[str] = None,
+        layout: sync.Layout = sync.Layout(),
+        processes: int = 1) -> Dict[str, Any]:
+    """Generate a corpus for each size and time a sync of it"""
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory(dir=root) as base:
+            print(f"Generating {size} snippets...", file=sys.stderr)
+            generate(base, size, seed)
+            print(f"Running sync on {size} snippets...", file=sys.stderr)
+            results.append(run(base, layout, processes))
+
+    return {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "seed": seed,
+        "layout": dataclasses.asdict(layout),
+        "results": results
+    }
+
+def _use_base(root: str) -> None:
+    # reload to clear the cached paths of a previous base
+    importlib.reload(paths)
+    paths.BASE_PATH = root
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=paths.scripts(),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark sync on synthetic corpora")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, metavar="N",
+                        help=f"numbers of snippets to generate (default: {' '.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated corpora")
+    parser.add_argument("--dir", help="directory for the generated corpora (default: the system temp dir)")
+    parser.add_argument("--pagination-window", type=int, metavar="N",
+                        help="benchmark windowed pagination, see sync.py --pagination-window")
+    parser.add_argument("--processes", type=int, default=1, metavar="N",
+                        help="also time rendering with N processes against rendering serially")
+    parser.add_argument("--memory", type=int, metavar="N",
+                        help="only measure the memory taken by N snippets, as Snippet and as CompactSnippet")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    if args.memory:
+        report = json.dumps(memory(args.memory, args.seed), indent=2)
+    else:
+        report = json.dumps(benchmark(args.sizes, args.seed, args.dir,
+                                      sync.Layout(pagination_window=args.pagination_window), args.processes), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(report + "\n")
+    else:
+        print(report)
@@ -0,0 +1,112 @@
+import os
+import sqlite3
+from contextlib import closing
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import paths
+import snippets
+import stats
+from snippets import Snippet
+
+# Bump this when the schema changes, to rebuild the catalog
+VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snippets (
+    folder TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    created TEXT NOT NULL,
+    path TEXT NOT NULL,
+    is_draft INTEGER NOT NULL,
+    tags TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS snippets_created ON snippets (created, path);
+CREATE TABLE IF NOT EXISTS tags (
+    tag TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    PRIMARY KEY (tag, folder)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tags_folder ON tags (folder);
+"""
+
+# Columns of the snippets table, in the order of the Snippet fields
+_COLUMNS = "title, summary, created, tags, path, is_draft"
+
+Row = Tuple[str, str, str, str, str, int]
+
+def update(all_snippets: Iterable[Snippet]) -> int:
+    """Update the catalog with the snippets and return the number of snippets added or changed
+
+    Snippets which no longer exist are removed.
+    """
+    os.makedirs(paths.index(), exist_ok=True)
+    with closing(_connect()) as db, db:
+        cataloged: Dict[str, Row] = {row[0]: row[1:]
+                                     for row in db.execute(f"SELECT folder, {_COLUMNS} FROM snippets")}
+        current = set()
+        count = 0
+        for snippet in all_snippets:
+            folder = snippets.folder_of(snippet)
+            current.add(folder)
+            row = _row(snippet)
+            if cataloged.get(folder) == row:
+                continue
+            _remove(db, folder)
+            db.execute(f"INSERT INTO snippets (folder, {_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)", (folder, *row))
+            db.executemany("INSERT INTO tags (tag, folder) VALUES (?, ?)", ((tag, folder) for tag in snippet.tags))
+            count += 1
+
+        for folder in cataloged.keys() - current:
+            _remove(db, folder)
+
+    stats.add("cataloged", count)
+    return count
+
+def get_all(
+        tag: Optional[str] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None) -> List[Snippet]:
+    """Get the snippets in the catalog, in the order of snippets.get_all
+
+    Only the snippets with tag are returned if it is given, and only those
+    created from start to end, inclusive, if they are given.
+    """
+    if not os.path.exists(paths.catalog()):
+        raise FileNotFoundError(f"{paths.catalog()} not found, run sync.py to create it")
+
+    conditions: List[str] = []
+    params: List[str] = []
+    if tag is not None:
+        conditions.append("folder IN (SELECT folder FROM tags WHERE tag = ?)")
+        params.append(tag)
+    if start is not None:
+        conditions.append("created >= ?")
+        params.append(start.isoformat())
+    if end is not None:
+        conditions.append("created <= ?")
+        params.append(end.isoformat())
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    with closing(_connect()) as db:
+        rows = db.execute(f"SELECT {_COLUMNS} FROM snippets {where} ORDER BY created, path", params)
+        return [Snippet(title, summary, date.fromisoformat(created), frozenset(tags.split()), path, bool(is_draft))
+                for title, summary, created, tags, path, is_draft in rows]
+
+def _connect() -> sqlite3.Connection:
+    db = sqlite3.connect(paths.catalog())
+    if db.execute("PRAGMA user_version").fetchone()[0] != VERSION:
+        db.executescript("DROP TABLE IF EXISTS tags; DROP TABLE IF EXISTS snippets;")
+        db.execute(f"PRAGMA user_version = {VERSION}")
+    db.executescript(SCHEMA)
+    return db
+
+def _remove(db: sqlite3.Connection, folder: str) -> None:
+    db.execute("DELETE FROM tags WHERE folder = ?", (folder,))
+    db.execute("DELETE FROM snippets WHERE folder = ?", (folder,))
+
+def _row(snippet: Snippet) -> Row:
+    return (snippet.title, snippet.summary, snippet.created.isoformat(),
+            " ".join(sorted(snippet.tags)), snippet.path, int(snippet.is_draft))
+
@@ -0,0 +1,184 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Dict, Iterable, List, Tuple
+
+import paths
+import snippets
+import stats
+from snippets import Snippet
+
+# Bump this when the format of the cache or how lines are counted changes
+VERSION = 1
+
+# Files are read in chunks of this size, so large files are never held in memory
+READ_SIZE = 64 * 1024
+
+# Folders are sent to worker processes in batches of this size
+CHUNK_SIZE = 16
+
+# Languages of source files by extension, other files are not counted
+LANGUAGES = {
+    ".c": "C",
+    ".h": "C",
+    ".cpp": "C++",
+    ".cc": "C++",
+    ".hpp": "C++",
+    ".cs": "C#",
+    ".csproj": "MSBuild",
+    ".fs": "F#",
+    ".go": "Go",
+    ".java": "Java",
+    ".kt": "Kotlin",
+    ".js": "JavaScript",
+    ".jsx": "JavaScript",
+    ".ts": "TypeScript",
+    ".tsx": "TypeScript",
+    ".py": "Python",
+    ".rb": "Ruby",
+    ".rs": "Rust",
+    ".swift": "Swift",
+    ".sh": "Shell",
+    ".ps1": "PowerShell",
+    ".sql": "SQL",
+}
+
+# Mtime and size of every file in a snippet folder, by path relative to it
+Signature = List[Tuple[str, int, int]]
+
+# Language, number of snippets, files and lines of code, by lines of code
+Summary = List[Tuple[str, int, int, int]]
+
+@dataclass(frozen=True)
+class CodeStats:
+    """Source files of a snippet and their lines of code, per language"""
+    # language, files and lines of code, by lines of code
+    languages: Tuple[Tuple[str, int, int], ...] = ()
+
+    @property
+    def files(self) -> int:
+        return sum(files for _, files, _ in self.languages)
+
+    @property
+    def lines(self) -> int:
+        return sum(lines for _, _, lines in self.languages)
+
+def update(
+        all_snippets: Iterable[Snippet],
+        full: bool = False,
+        save: bool = True,
+        processes: int = 1) -> Dict[Snippet, CodeStats]:
+    """Returns the code statistics of the snippets, reading only the folders changed since the last run
+
+    The statistics are cached with the mtime and size of every file in the
+    folder, so a folder is read again only if one of its files changed, unless
+    full is True. If processes is more than 1, the folders are read by a pool
+    of worker processes.
+    """
+    cached = {} if full else _load()
+    folders = {snippet: snippets.folder_of(snippet) for snippet in all_snippets}
+    signatures = {folder: signature(folder) for folder in folders.values()}
+    entries: Dict[str, Dict[str, Any]] = {}
+    stale: List[str] = []
+    for folder, current in signatures.items():
+        entry = cached.get(folder)
+        if entry is not None and entry["signature"] == _dump_signature(current):
+            entries[folder] = entry
+        else:
+            stale.append(folder)
+
+    for folder, code in zip(stale, _compute_all(stale, processes)):
+        entries[folder] = {"signature": _dump_signature(signatures[folder]), "languages": code.languages}
+        stats.add("measured")
+        stats.add("lines", code.lines)
+    stats.add("cached", len(entries) - len(stale))
+    print(f"{len(stale)} measured, {len(entries) - len(stale)} loaded from cache.")
+
+    if save:
+        _save(entries)
+    return {snippet: _load_stats(entries[folder]) for snippet, folder in folders.items()}
+
+def compute(folder_with_date: str) -> CodeStats:
+    """Count the source files and the lines of code of each language in a snippet folder"""
+    counts: Dict[str, List[int]] = {}
+    for path, _, _ in signature(folder_with_date):
+        language = LANGUAGES.get(os.path.splitext(path)[1].lower())
+        if language is None:
+            continue
+        count = counts.setdefault(language, [0, 0])
+        count[0] += 1
+        count[1] += count_lines(os.path.join(paths.src(), folder_with_date, path))
+    return CodeStats(tuple(sorted(((language, files, lines) for language, (files, lines) in counts.items()),
+                                  key=lambda c: (-c[2], c[0]))))
+
+def count_lines(path: str) -> int:
+    """Count the lines of a file which are not blank, reading it in chunks"""
+    lines = 0
+    blank = True
+    with open(path, "rb") as file:
+        for chunk in iter(partial(file.read, READ_SIZE), b""):
+            for i, part in enumerate(chunk.split(b"\n")):
+                # every part but the first starts a new line
+                if i > 0:
+                    lines += not blank
+                    blank = True
+                if blank and part.strip():
+                    blank = False
+    return lines + (not blank)
+
+def signature(folder_with_date: str) -> Signature:
+    """Returns the mtime and size of every file in a snippet folder, by path relative to it"""
+    folder = os.path.join(paths.src(), folder_with_date)
+    result: Signature = []
+    for root, dirs, files in os.walk(folder):
+        # hidden folders, e.g. .git or .vs, are not part of the snippet
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            result.append((paths.rel(path, folder), stat.st_mtime_ns, stat.st_size))
+    return result
+
+def summarize(code: Iterable[CodeStats]) -> Summary:
+    """Add up the statistics of the snippets by language"""
+    totals: Dict[str, List[int]] = {}
+    for snippet_code in code:
+        for language, files, lines in snippet_code.languages:
+            total = totals.setdefault(language, [0, 0, 0])
+            total[0] += 1
+            total[1] += files
+            total[2] += lines
+    return sorted(((language, *total) for language, total in totals.items()), key=lambda t: (-t[3], t[0]))
+
+def _compute_all(folders: List[str], processes: int) -> Iterable[CodeStats]:
+    if processes <= 1 or len(folders) <= 1:
+        return map(compute, folders)
+    with ProcessPoolExecutor(processes, initializer=paths.init_process, initargs=(paths.base(),)) as executor:
+        return list(executor.map(compute, folders, chunksize=CHUNK_SIZE))
+
+def _dump_signature(signature: Signature) -> List[List[Any]]:
+    # as it is loaded from json
+    return [list(file) for file in signature]
+
+def _load_stats(entry: Dict[str, Any]) -> CodeStats:
+    return CodeStats(tuple(tuple(language) for language in entry["languages"]))
+
+def _load() -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(paths.code(), encoding="utf-8") as file:
+            stats.add("bytes_read", os.fstat(file.fileno()).st_size)
+            cache = json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if cache.get("version") != VERSION:
+        return {}
+    return cache["snippets"]
+
+def _save(entries: Dict[str, Dict[str, Any]]) -> None:
+    os.makedirs(paths.index(), exist_ok=True)
+    temp = paths.code() + ".tmp"
+    with open(temp, "w", encoding="utf-8") as file:
+        json.dump({"version": VERSION, "snippets": entries}, file, separators=(",", ":"))
+    os.replace(temp, paths.code())
@@ -0,0 +1,97 @@
+import sys
+from datetime import date
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional
+
+from snippets import Snippet
+
+class Vocabulary:
+    """Tags interned and numbered, so that a set of tags can be stored as an integer bitmask"""
+    def __init__(self) -> None:
+        self.tags: List[str] = []
+        self._bits: Dict[str, int] = {}
+
+    def add(self, tags: Iterable[str]) -> int:
+        """Returns the bitmask of tags, adding the tags which are not in the vocabulary yet"""
+        mask = 0
+        # sorted, so that the numbering doesn't depend on the order of sets
+        for tag in sorted(tags):
+            bit = self._bits.get(tag)
+            if bit is None:
+                bit = self._bits[tag] = len(self.tags)
+                self.tags.append(sys.intern(tag))
+            mask |= 1 << bit
+        return mask
+
+    def mask(self, tags: Iterable[str]) -> Optional[int]:
+        """Returns the bitmask of tags, or None if any of them is not in the vocabulary"""
+        mask = 0
+        for tag in tags:
+            bit = self._bits.get(tag)
+            if bit is None:
+                return None
+            mask |= 1 << bit
+        return mask
+
+    def tags_of(self, mask: int) -> FrozenSet[str]:
+        """Returns the tags in a bitmask"""
+        tags = []
+        while mask:
+            lowest = mask & -mask
+            tags.append(self.tags[lowest.bit_length() - 1])
+            mask ^= lowest
+        return frozenset(tags)
+
+class CompactSnippet:
+    """A snippet with its tags as a bitmask of a Vocabulary and its date as an ordinal"""
+    __slots__ = ("title", "summary", "created", "tags", "path", "is_draft")
+
+    def __init__(self, title: str, summary: str, created: int, tags: int, path: str, is_draft: bool) -> None:
+        self.title = title
+        self.summary = summary
+        self.created = created
+        self.tags = tags
+        self.path = path
+        self.is_draft = is_draft
+
+class CompactSnippets:
+    """Snippets stored as CompactSnippet sharing one Vocabulary, with fast filtering by tags"""
+    def __init__(self, snippets: Iterable[Snippet] = ()) -> None:
+        self.vocabulary = Vocabulary()
+        self.items: List[CompactSnippet] = []
+        for snippet in snippets:
+            self.add(snippet)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __iter__(self) -> Iterator[Snippet]:
+        return (self.snippet(item) for item in self.items)
+
+    def add(self, snippet: Snippet) -> CompactSnippet:
+        """Add a snippet and return its compact representation"""
+        item = CompactSnippet(snippet.title, snippet.summary, snippet.created.toordinal(),
+                              self.vocabulary.add(snippet.tags), sys.intern(snippet.path), snippet.is_draft)
+        self.items.append(item)
+        return item
+
+    def snippet(self, item: CompactSnippet) -> Snippet:
+        """Convert a compact snippet back to a Snippet"""
+        return Snippet(item.title, item.summary, date.fromordinal(item.created),
+                       self.vocabulary.tags_of(item.tags), item.path, item.is_draft)
+
+    def has_tag(self, item: CompactSnippet, tag: str) -> bool:
+        """Returns whether a compact snippet has a tag"""
+        mask = self.vocabulary.mask([tag])
+        return mask is not None and item.tags & mask != 0
+
+    def with_tags(self, all_of: Iterable[str] = (), any_of: Optional[Iterable[str]] = None) -> Iterator[CompactSnippet]:
+        """Yield the snippets having all the tags in all_of, and at least one in any_of if it is given"""
+        required = self.vocabulary.mask(all_of)
+        if required is None:
+            return
+        optional = None
+        if any_of is not None:
+            optional = self.vocabulary.mask(tag for tag in any_of if self.vocabulary.mask([tag]) is not None)
+        for item in self.items:
+            if item.tags & required == required and (optional is None or item.tags & optional):
+                yield item
@@ -1,76 +1,226 @@
-from typing import Iterable, Tuple, List, Callable
+import calendar
+import os
+import re
+from typing import Iterable, Iterator, Mapping, Tuple, List, Callable, Optional
+from urllib.parse import quote
 
 import paths
 import template
-from snippets import Snippet
+from codestats import CodeStats, Summary
+from snippets import Snippet, folder_of
 
 SnippetPage = Iterable[Snippet]
 SnippetsByYear = Iterable[Tuple[int, Iterable[Snippet]]]
 SnippetsByTag = Iterable[Tuple[str, Iterable[Snippet]]]
+# the number of snippets in each year, and in each month of the year if the archive is split by month
+ArchiveShards = Iterable[Tuple[int, Iterable[Tuple[Optional[int], int]]]]
+# the code statistics shown with the snippets if they are shown, by snippets.folder_of
+CodeStatsBySnippet = Optional[Mapping[str, CodeStats]]
 
 def gen_page(
         snippets: SnippetPage,
         total_pages: int,
         current_page: int,
-        current_path: str) -> str:
-    """Generate contents on one page"""
-    templ = template.load("page.md")
+        current_path: str,
+        window: Optional[int] = None,
+        code: CodeStatsBySnippet = None) -> str:
+    """Generate contents on one page, linking to the pages within window of it, or to all pages if window is None"""
+    return "".join(stream_page(snippets, total_pages, current_page, current_path, window, code))
+
+def stream_page(
+        snippets: SnippetPage,
+        total_pages: int,
+        current_page: int,
+        current_path: str,
+        window: Optional[int] = None,
+        code: CodeStatsBySnippet = None) -> Iterator[str]:
+    """Generate contents on one page in chunks"""
+    templ = template.get("page.md")
     header = _gen_header(current_path)
-    items = "\n".join(_gen_item(snippet, current_path) for snippet in snippets)
-    pagination = _gen_pagination(total_pages, current_page, current_path)
-    return templ.format(pagination=pagination, header=header, items=items)
+    items = _join("\n", (_gen_item(snippet, current_path, code=_code_of(code, snippet)) for snippet in snippets))
+    pagination = _gen_pagination(total_pages, current_page, current_path, window=window)
+    return templ.stream(pagination=pagination, header=header, items=items)
+
+def gen_archive(
+        snippets_by_year: SnippetsByYear,
+        code: CodeStatsBySnippet = None,
+        summary: Optional[Summary] = None) -> str:
+    """Generate the archive index, starting with the summary of the code if it is given"""
+    return "".join(stream_archive(snippets_by_year, code, summary))
 
-def gen_archive(snippets_by_year: SnippetsByYear) -> str:
-    """Generate the archive index"""
+def stream_archive(
+        snippets_by_year: SnippetsByYear,
+        code: CodeStatsBySnippet = None,
+        summary: Optional[Summary] = None) -> Iterator[str]:
+    """Generate the archive index in chunks"""
     current_path = paths.index()
-    templ = template.load("archive.md")
+    templ = template.get("archive.md")
     header = _gen_header(current_path)
-    items: List[str] = []
-    for year, snippets in snippets_by_year:
-        items.append(f"## {year}")
-        for snippet in snippets:
-            items.append(_gen_item(snippet, current_path, show_summary=False))
-    return templ.format(header=header, items_by_year="\n".join(items))
+    def items() -> Iterator[str]:
+        if summary is not None:
+            yield _gen_code_summary(summary)
+        for year, snippets in snippets_by_year:
+            yield f"## {year}"
+            for snippet in snippets:
+                yield _gen_item(snippet, current_path, show_summary=False, code=_code_of(code, snippet))
+    return templ.stream(header=header, items_by_year=_join("\n", items()))
+
+def gen_archive_shard(
+        year: int,
+        month: Optional[int],
+        snippets: SnippetPage,
+        code: CodeStatsBySnippet = None) -> str:
+    """Generate the archive of a year, or of a month if month is not None"""
+    return "".join(stream_archive_shard(year, month, snippets, code))
 
-def gen_tags(snippets_by_tag: SnippetsByTag) -> str:
+def stream_archive_shard(
+        year: int,
+        month: Optional[int],
+        snippets: SnippetPage,
+        code: CodeStatsBySnippet = None) -> Iterator[str]:
+    """Generate the archive of a year or a month in chunks"""
+    current_path = os.path.dirname(paths.archive_shard(year, month))
+    templ = template.get("archive_shard.md")
+    header = _gen_header(current_path)
+    period = str(year) if month is None else f"{calendar.month_name[month]} {year}"
+    items = _join("\n", (_gen_item(snippet, current_path, show_summary=False, code=_code_of(code, snippet))
+                         for snippet in snippets))
+    return templ.stream(period=period, header=header, items=items)
+
+def gen_archive_directory(shards: ArchiveShards, by_month: bool, summary: Optional[Summary] = None) -> str:
+    """Generate the archive index linking to the archive of each year or month"""
+    current_path = paths.index()
+    templ = template.get("archive.md")
+    header = _gen_header(current_path)
+    make_link: Callable[[int, Optional[int]], str] = \
+        lambda y, m: paths.rel(paths.archive_shard(y, m), current_path)
+    count: Callable[[int], str] = lambda n: f"{n} snippet{'' if n == 1 else 's'}"
+    blocks: List[str] = []
+    for year, months in shards:
+        lines = [f"- [{year if month is None else calendar.month_name[month]}]({make_link(year, month)}) ({count(n)})"
+                 for month, n in months]
+        if by_month:
+            lines.insert(0, f"## {year}\n")
+        blocks.append("\n".join(lines))
+    items_by_year = ("\n\n" if by_month else "\n").join(blocks)
+    if summary is not None:
+        items_by_year = f"{_gen_code_summary(summary)}\n{items_by_year}"
+    return templ.render(header=header, items_by_year=items_by_year)
+
+def gen_tags(snippets_by_tag: SnippetsByTag, code: CodeStatsBySnippet = None) -> str:
     """Generate the tags index"""
+    return "".join(stream_tags(snippets_by_tag, code))
+
+def stream_tags(snippets_by_tag: SnippetsByTag, code: CodeStatsBySnippet = None) -> Iterator[str]:
+    """Generate the tags index in chunks"""
     current_path = paths.index()
-    templ = template.load("tags.md")
+    templ = template.get("tags.md")
     header = _gen_header(current_path)
     all_tags = _gen_all_tags(tag for tag, _ in snippets_by_tag)
+    def items() -> Iterator[str]:
+        for tag, snippets in snippets_by_tag:
+            yield f"## {tag}\n"
+            for snippet in snippets:
+                yield _gen_item(snippet, current_path, show_summary=False, code=_code_of(code, snippet))
+            yield ""
+    return templ.stream(header=header, all_tags=all_tags, items_by_tag=_join("\n", items()))
+
+def gen_tag_page(
+        tag: str,
+        snippets: SnippetPage,
+        total_pages: int,
+        current_page: int,
+        current_path: str,
+        window: Optional[int] = None,
+        code: CodeStatsBySnippet = None) -> str:
+    """Generate one page of the snippets with a tag"""
+    return "".join(stream_tag_page(tag, snippets, total_pages, current_page, current_path, window, code))
+
+def stream_tag_page(
+        tag: str,
+        snippets: SnippetPage,
+        total_pages: int,
+        current_page: int,
+        current_path: str,
+        window: Optional[int] = None,
+        code: CodeStatsBySnippet = None) -> Iterator[str]:
+    """Generate one page of the snippets with a tag in chunks"""
+    templ = template.get("tag.md")
+    header = _gen_header(current_path)
+    items = _join("\n", (_gen_item(snippet, current_path, show_summary=False, code=_code_of(code, snippet))
+                         for snippet in snippets))
+    pagination = _gen_pagination(total_pages, current_page, current_path, pages_path=current_path, window=window)
+    return templ.stream(tag=tag, header=header, items=items, pagination=pagination)
+
+def gen_tag_directory(tag_counts: Iterable[Tuple[str, int]]) -> str:
+    """Generate the tags index with the number of snippets of each tag and a link to its pages"""
+    current_path = paths.index()
+    templ = template.get("tags.md")
+    header = _gen_header(current_path)
+    all_tags = _gen_all_tags(tag for tag, _ in tag_counts)
     items: List[str] = []
-    for tag, snippets in snippets_by_tag:
+    for tag, count in tag_counts:
+        link = quote(f"{paths.rel(paths.tag_pages(tag), current_path)}/1.md")
         items.append(f"## {tag}\n")
-        for snippet in snippets:
-            items.append(_gen_item(snippet, current_path, show_summary=False))
-        items.append("")
-    return templ.format(header=header, all_tags=all_tags, items_by_tag="\n".join(items))
+        items.append(f"[{count} snippet{'' if count == 1 else 's'}]({link})\n")
+    return templ.render(header=header, all_tags=all_tags, items_by_tag="\n".join(items))
+
+def _join(separator: str, parts: Iterable[str]) -> Iterator[str]:
+    # like separator.join(parts), but yielding the parts instead of building one string
+    first = True
+    for part in parts:
+        if not first:
+            yield separator
+        yield part
+        first = False
 
 def _gen_header(current_path: str) -> str:
-    home = f"[Home]({paths.rel(paths.base(), current_path)}/README.md)"
-    archive = f"[Archive]({paths.rel(paths.index(), current_path)}/archive.md)"
-    tags = f"[Tags]({paths.rel(paths.index(), current_path)}/tags.md)"
+    links = paths.links(current_path)
+    home = f"[Home]({links.base}/README.md)"
+    archive = f"[Archive]({links.index}/archive.md)"
+    tags = f"[Tags]({links.index}/tags.md)"
     return " | ".join([home, archive, tags])
 
 def _gen_item(
         snippet: Snippet,
         current_path: str,
-        show_summary: bool = True) -> str:
-    link = f"{paths.rel(paths.snippet_path(snippet.path, snippet.created), current_path)}/README.md"
+        show_summary: bool = True,
+        code: Optional[CodeStats] = None) -> str:
+    link = f"{paths.links(current_path).snippet(snippet.path, snippet.created)}/README.md"
     parts: List[str] = []
     parts.append(f"- __[{snippet.title}]({link})__")
     parts.append(f"  _`{snippet.created}`_")
-    parts.append(f"  {_gen_tags(snippet, current_path)}\n")
+    if code is not None and code.languages:
+        parts.append(f"  {_gen_tags(snippet, current_path)}")
+        parts.append(f"  {_gen_code(code)}\n")
+    else:
+        parts.append(f"  {_gen_tags(snippet, current_path)}\n")
 
     if show_summary:
         parts.append(f"  > {snippet.summary}")
     return "\n".join(parts)
 
+def _code_of(code: CodeStatsBySnippet, snippet: Snippet) -> Optional[CodeStats]:
+    return None if code is None else code.get(folder_of(snippet))
+
+def _gen_code(code: CodeStats) -> str:
+    plural: Callable[[int, str], str] = lambda n, word: f"{n} {word}{'' if n == 1 else 's'}"
+    languages = ", ".join(f"{language} {plural(lines, 'line')}" for language, _, lines in code.languages)
+    return f"{languages} in {plural(code.files, 'file')}"
+
+def _gen_code_summary(summary: Summary) -> str:
+    rows = ["## Code\n", "| Language | Snippets | Files | Lines |", "| --- | ---: | ---: | ---: |"]
+    rows += [f"| {language} | {snippets} | {files} | {lines} |" for language, snippets, files, lines in summary]
+    return "\n".join(rows) + "\n"
+
 def _gen_pagination(
         total_pages: int,
         current_page: int,
-        current_path: str) -> str:
-    make_link: Callable[[str], str] = lambda p: f"{paths.rel(paths.pages(), current_path)}/{p}.md"
+        current_path: str,
+        pages_path: Optional[str] = None,
+        window: Optional[int] = None) -> str:
+    prefix = paths.rel(pages_path, current_path) if pages_path else paths.links(current_path).pages
+    make_link: Callable[[str], str] = lambda p: f"{prefix}/{p}.md"
 
     links: List[str] = []
     has_newer = current_page != 1
@@ -79,22 +229,38 @@ def _gen_pagination(
     if has_newer:
         links.append(f"[Newer]({make_link(str(current_page - 1))})")
 
-    for i in range(1, total_pages + 1):
+    previous = 0
+    for i in _pages_in_window(total_pages, current_page, window):
+        if i != previous + 1:
+            links.append("...")
         if i != current_page:
             links.append(f"[{str(i)}]({make_link(str(i))})")
         else:
             links.append(str(i))
+        previous = i
 
     if has_older:
         links.append(f"[Older]({make_link(str(current_page + 1))})")
 
     return " | ".join(links)
 
+def _pages_in_window(total_pages: int, current_page: int, window: Optional[int]) -> Iterable[int]:
+    if window is None:
+        return range(1, total_pages + 1)
+    start = max(current_page - window, 1)
+    end = min(current_page + window, total_pages)
+    return sorted({1, total_pages, *range(start, end + 1)})
+
+def anchor(heading: str) -> str:
+    """Returns the anchor GitHub generates for a heading, lowercase, without punctuation and with spaces as hyphens"""
+    return re.sub(r"[^\w\- ]", "", heading.lower()).replace(" ", "-")
+
 def _gen_all_tags(tags: Iterable[str]) -> str:
-    make_tag: Callable[[str], str] = lambda t: f"[`{t}`](./tags.md#{t})"
+    make_tag: Callable[[str], str] = lambda t: f"[`{t}`](./tags.md#{anchor(t)})"
     return "All tags: " + ", ".join(make_tag(tag) for tag in tags)
 
 def _gen_tags(snippet: Snippet, current_path: str) -> str:
-    make_tag: Callable[[str], str] = lambda t: f"[`{t}`]({paths.rel(paths.index(), current_path)}/tags.md#{t})"
+    index = paths.links(current_path).index
+    make_tag: Callable[[str], str] = lambda t: f"[`{t}`]({index}/tags.md#{anchor(t)})"
     links = [make_tag(t) for t in sorted(snippet.tags)]
     return ", ".join(links)
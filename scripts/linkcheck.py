@@ -0,0 +1,141 @@
+import argparse
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from glob import glob
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import unquote
+
+import gen
+import paths
+import snippets
+
+# [text](target "title") and ![alt](target), with the target in group 1
+_INLINE = re.compile(r"!?\[(?:[^\[\]]|\[[^\[\]]*\])*\]\(\s*<?([^)\s>]*)>?(?:\s+\"[^\"]*\")?\s*\)")
+# [id]: target
+_DEFINITION = re.compile(r"^\s{0,3}\[[^\]]+\]:\s*<?([^\s>]+)>?")
+_HEADING = re.compile(r"^\s{0,3}(#{1,6})\s+(.*?)\s*#*\s*$")
+_FENCE = re.compile(r"^\s{0,3}(```|~~~)")
+_INLINE_CODE = re.compile(r"`[^`]*`")
+# links with a scheme, e.g. https: or mailto:, are not checked
+_EXTERNAL = re.compile(r"^[A-Za-z][A-Za-z0-9+.-]*:")
+
+@dataclass(frozen=True)
+class BrokenLink:
+    """A link in a markdown file which doesn't resolve"""
+    source: str
+    line: int
+    target: str
+    reason: str
+
+    def __str__(self) -> str:
+        return f"{paths.rel(self.source, os.getcwd())}:{self.line}: {self.target} ({self.reason})"
+
+class LinkChecker:
+    """Check the relative links and anchors of markdown files
+
+    Resolving a target and reading the headings of a file are cached, so a
+    target linked from many files is only looked up once, even by threads
+    checking files at the same time.
+    """
+    def __init__(self, jobs: int = 8) -> None:
+        self.jobs = jobs
+        self._exists: Dict[str, bool] = {}
+        self._anchors: Dict[str, FrozenSet[str]] = {}
+        self._exists_lock = threading.Lock()
+        self._anchors_lock = threading.Lock()
+
+    def check(self, files: Iterable[str]) -> List[BrokenLink]:
+        """Check the links of the files in a pool of jobs threads, and return the broken ones in order"""
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            return [broken for results in executor.map(self.check_file, files) for broken in results]
+
+    def check_file(self, source: str) -> List[BrokenLink]:
+        """Check the links of one markdown file"""
+        broken = []
+        folder = os.path.dirname(source)
+        for line, target in _links(source):
+            path, _, anchor = target.partition("#")
+            path = os.path.normpath(os.path.join(folder, unquote(path))) if path else source
+            reason = self._resolve(path, unquote(anchor))
+            if reason:
+                broken.append(BrokenLink(source, line, target, reason))
+        return broken
+
+    def _resolve(self, path: str, anchor: str) -> Optional[str]:
+        with self._exists_lock:
+            exists = self._exists.get(path)
+            if exists is None:
+                exists = self._exists[path] = os.path.exists(path)
+        if not exists:
+            return "not found"
+        if anchor and anchor.lower() not in self.anchors(path):
+            return "anchor not found"
+        return None
+
+    def anchors(self, path: str) -> FrozenSet[str]:
+        """Returns the anchors of the headings of a markdown file, as GitHub generates them"""
+        with self._anchors_lock:
+            anchors = self._anchors.get(path)
+            if anchors is None:
+                anchors = self._anchors[path] = frozenset(_anchors(path)) if path.endswith(".md") else frozenset()
+        return anchors
+
+def files() -> List[str]:
+    """List the generated markdown files and the README.md of every snippet"""
+    generated = [os.path.join(paths.base(), "README.md")]
+    generated += sorted(glob(os.path.join(paths.index(), "**", "*.md"), recursive=True))
+    readmes = [snippets.file_path(folder, "README.md") for folder in snippets.folders()]
+    return [path for path in generated + readmes if os.path.isfile(path)]
+
+def check(jobs: int = 8) -> List[BrokenLink]:
+    """Check the links of all generated files and snippets, and return the broken ones"""
+    return LinkChecker(jobs).check(files())
+
+def _lines(path: str) -> Iterator[Tuple[int, str]]:
+    # lines outside of fenced code blocks
+    fenced = False
+    with open(path, encoding="utf-8") as file:
+        for number, line in enumerate(file, 1):
+            if _FENCE.match(line):
+                fenced = not fenced
+            elif not fenced:
+                yield number, line
+
+def _links(path: str) -> Iterator[Tuple[int, str]]:
+    for number, line in _lines(path):
+        line = _INLINE_CODE.sub("", line)
+        definition = _DEFINITION.match(line)
+        targets = [definition.group(1)] if definition else _INLINE.findall(line)
+        for target in targets:
+            if target and not _EXTERNAL.match(target):
+                yield number, target
+
+def _anchors(path: str) -> Iterator[str]:
+    seen: Dict[str, int] = {}
+    for _, line in _lines(path):
+        heading = _HEADING.match(line)
+        if heading is None:
+            continue
+        # numbered if repeated
+        slug = gen.anchor(heading.group(2))
+        count = seen.get(slug, 0)
+        seen[slug] = count + 1
+        yield slug if count == 0 else f"{slug}-{count}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the links of the generated files and the snippets")
+    parser.add_argument("--jobs", type=int, default=8, metavar="N",
+                        help="check files with N threads (default: 8)")
+    args = parser.parse_args()
+
+    broken_links = check(args.jobs)
+    for broken_link in broken_links:
+        print(broken_link)
+    if broken_links:
+        print(f"{len(broken_links)} broken links found.")
+        sys.exit(1)
+    print("No broken links found.")
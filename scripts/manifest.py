@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import paths
+import snippets
+import stats
+from snippets import Snippet
+
+# Bump this when the format of the manifest changes
+VERSION = 1
+
+Entry = Dict[str, Any]
+Signature = List[Optional[List[int]]]
+
+def get_all(full: bool = False, save: bool = True, jobs: int = 1, newest_first: bool = False) -> List[Snippet]:
+    """Get all snippets, re-parsing only the folders changed since the last run
+
+    The manifest records the size and mtime of every snippet's README.md and
+    tags files, a hash of their contents and the parsed snippet, or None if
+    the folder is skipped. Folders whose files are unchanged are loaded from
+    the manifest. If full is True, the
+    manifest is ignored and rebuilt from scratch. If save is False, the
+    manifest is not updated on disk. Changed folders are parsed by a pool of
+    jobs threads. The snippets are in the order of snippets.folders(newest_first).
+    """
+    cached = {} if full else _load()
+    entries: Dict[str, Optional[Entry]] = {}
+    signatures: Dict[str, Signature] = {}
+
+    for folder in snippets.folders(newest_first):
+        current = signature(folder)
+        entry = cached.get(folder)
+
+        if entry is not None and entry["signature"] != current:
+            # touched but possibly not modified, e.g. after a checkout
+            digest = _digest(folder)
+            entry = {**entry, "signature": current} if entry["hash"] == digest else None
+
+        entries[folder] = entry
+        signatures[folder] = current
+
+    stale = [folder for folder, entry in entries.items() if entry is None]
+    parsed = 0
+    for folder, snippet in snippets.parse_all(stale, jobs):
+        # skipped folders are recorded too, so they are not parsed again until they change
+        parsed += snippet is not None
+        entries[folder] = {"signature": signatures[folder], "hash": _digest(folder),
+                           "snippet": None if snippet is None else _dump(snippet)}
+
+    loaded = [_load_snippet(entry["snippet"]) for entry in entries.values() if entry["snippet"] is not None]
+    stats.add("parsed", parsed)
+    stats.add("cached", len(loaded) - parsed)
+    print(f"{parsed} parsed, {len(loaded) - parsed} loaded from cache.")
+    if save:
+        _save(entries)
+    return loaded
+
+def signature(folder_with_date: str) -> Signature:
+    """Returns the mtime and size of the README.md and tags files in a snippet folder"""
+    signature: Signature = []
+    for filename in ("README.md", "tags"):
+        try:
+            stat = os.stat(snippets.file_path(folder_with_date, filename))
+            signature.append([stat.st_mtime_ns, stat.st_size])
+        except FileNotFoundError:
+            signature.append(None)
+    return signature
+
+def _digest(folder_with_date: str) -> str:
+    sha = hashlib.sha1()
+    # only the beginning of README.md is parsed, so changes after it don't matter
+    for filename, size in (("README.md", snippets.README_MAX_BYTES), ("tags", -1)):
+        try:
+            with open(snippets.file_path(folder_with_date, filename), "rb") as file:
+                data = file.read(size)
+            stats.add("bytes_read", len(data))
+            sha.update(data)
+        except FileNotFoundError:
+            pass
+        sha.update(b"\0")
+    return sha.hexdigest()
+
+def _dump(snippet: Snippet) -> Dict[str, Any]:
+    return {
+        "title": snippet.title,
+        "summary": snippet.summary,
+        "created": snippet.created.isoformat(),
+        "tags": sorted(snippet.tags),
+        "path": snippet.path,
+        "is_draft": snippet.is_draft
+    }
+
+def _load_snippet(data: Dict[str, Any]) -> Snippet:
+    return Snippet(
+        data["title"],
+        data["summary"],
+        date.fromisoformat(data["created"]),
+        frozenset(data["tags"]),
+        data["path"],
+        data["is_draft"])
+
+def _load() -> Dict[str, Entry]:
+    try:
+        with open(paths.manifest(), encoding="utf-8") as file:
+            stats.add("bytes_read", os.fstat(file.fileno()).st_size)
+            manifest = json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if manifest.get("version") != VERSION:
+        return {}
+    return manifest["snippets"]
+
+def _save(entries: Dict[str, Entry]) -> None:
+    os.makedirs(paths.index(), exist_ok=True)
+    temp = paths.manifest() + ".tmp"
+    with open(temp, "w", encoding="utf-8") as file:
+        json.dump({"version": VERSION, "snippets": entries}, file, separators=(",", ":"))
+    os.replace(temp, paths.manifest())
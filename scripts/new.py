@@ -19,9 +19,7 @@ def new(folder_name: str) -> None:
     # Create README.md
 
     home_link = f"[Home]({paths.rel(paths.base(), snippet_path)}/README.md)"
-    readme = (template.load("README.md")
-              .replace("{title}", folder_name)
-              .replace("{home_link}", home_link))
+    readme = template.get("README.md").render(title=folder_name, home_link=home_link)
     with open(os.path.join(snippet_path, "README.md"), "x", encoding="utf-8") as file:
         file.write(readme)
 
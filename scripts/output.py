@@ -0,0 +1,113 @@
+import os
+from contextlib import suppress
+from itertools import chain
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+
+import paths
+import stats
+
+# A generated file, as one string or as an iterable of chunks
+Content = Union[str, Iterable[str]]
+
+# Characters copied at a time from an existing file
+_COPY_SIZE = 64 * 1024
+
+class Output:
+    """Write generated files, touching only the ones whose content changed
+
+    Files are replaced atomically with a temp file and a rename. If check is
+    True, nothing is written to disk but the changes are still recorded.
+    """
+    def __init__(self, check: bool = False) -> None:
+        self.check = check
+        self.changes: List[str] = []
+        self.unchanged = 0
+
+    def write(self, path: str, content: Content) -> None:
+        """Write content to path, unless the file is already up to date
+
+        Chunks of content are compared with the file as they are generated,
+        and streamed to a temp file from the first one that differs, so the
+        whole content is never held in memory.
+        """
+        chunks = iter([content] if isinstance(content, str) else content)
+        existing = _open(path)
+        try:
+            mismatch = _skip_same(existing, chunks)
+            if mismatch is None:
+                self.unchanged += 1
+                stats.add("unchanged")
+                return
+
+            self._record("create" if existing is None else "update", path)
+            if not self.check:
+                matched, chunk = mismatch
+                _replace(path, existing, matched, chain([chunk], chunks))
+                stats.add("written")
+        finally:
+            if existing is not None:
+                existing.close()
+
+    def prune(self, directory: str, keep: Iterable[str]) -> None:
+        """Delete the markdown files under directory which are not in keep, and the folders left empty"""
+        if not os.path.isdir(directory):
+            return
+        keep = {os.path.normpath(path) for path in keep}
+        for folder, _, names in os.walk(directory, topdown=False):
+            for name in sorted(names):
+                path = os.path.join(folder, name)
+                if name.endswith(".md") and os.path.normpath(path) not in keep:
+                    self._record("delete", path)
+                    if not self.check:
+                        os.remove(path)
+                        stats.add("deleted")
+            if not self.check and not os.listdir(folder):
+                os.rmdir(folder)
+
+    def _record(self, action: str, path: str) -> None:
+        self.changes.append(f"{action} {paths.rel(path, paths.base())}")
+
+def _open(path: str) -> Optional[TextIO]:
+    try:
+        file = open(path, encoding="utf-8")
+    except FileNotFoundError:
+        return None
+    stats.add("bytes_read", os.fstat(file.fileno()).st_size)
+    return file
+
+def _skip_same(existing: Optional[TextIO], chunks: Iterator[str]) -> Optional[Tuple[int, str]]:
+    # consume the chunks while they are the same as the existing file, then return the number of
+    # characters which were the same and the first chunk which is not, or None if all of the file is the same
+    if existing is None:
+        return 0, ""
+    matched = 0
+    for chunk in chunks:
+        if existing.read(len(chunk)) != chunk:
+            return matched, chunk
+        matched += len(chunk)
+    return None if existing.read(1) == "" else (matched, "")
+
+def _replace(path: str, existing: Optional[TextIO], matched: int, chunks: Iterable[str]) -> None:
+    # write the first matched characters of existing, then the chunks, closing existing before it is replaced
+    directory, name = os.path.split(path)
+    os.makedirs(directory, exist_ok=True)
+    temp = os.path.join(directory, f".{name}.tmp")
+    try:
+        with open(temp, "w", encoding="utf-8") as file:
+            if existing is not None:
+                existing.seek(0)
+                while matched:
+                    copied = existing.read(min(matched, _COPY_SIZE))
+                    file.write(copied)
+                    matched -= len(copied)
+                # a file can't be replaced while it is open on Windows
+                existing.close()
+            for chunk in chunks:
+                file.write(chunk)
+        stats.add("bytes_written", os.path.getsize(temp))
+        os.replace(temp, path)
+    except BaseException:
+        # the temp file may not have been created
+        with suppress(FileNotFoundError):
+            os.remove(temp)
+        raise
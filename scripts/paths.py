@@ -1,6 +1,8 @@
 import os
 from datetime import date
 from functools import cache
+from typing import Optional
+from urllib.parse import quote
 
 # Override this for testing
 BASE_PATH = None
@@ -9,7 +11,18 @@ SRC = "src"
 INDEX = "index"
 PAGES = "pages"
 TAGS = "tags"
+ARCHIVE = "archive"
 TEMPLATES = "templates"
+MANIFEST = "manifest.json"
+DIGESTS = "digests.json"
+SEARCH = "search.sqlite"
+CATALOG = "catalog.sqlite"
+CODE = "code.json"
+
+def init_process(base: str) -> None:
+    """Set BASE_PATH to base in a worker process, which may not inherit the one overridden for tests and benchmarks"""
+    global BASE_PATH
+    BASE_PATH = base
 
 @cache
 def scripts() -> str:
@@ -43,6 +56,51 @@ def pages() -> str:
     """Returns the path for the pages folder"""
     return os.path.join(index(), PAGES)
 
+@cache
+def tags() -> str:
+    """Returns the path for the folder of tag pages"""
+    return os.path.join(index(), TAGS)
+
+def tag_pages(tag: str) -> str:
+    """Returns the path for the pages of a tag, with the tag escaped to be a valid folder name"""
+    return os.path.join(tags(), quote(tag, safe=""))
+
+@cache
+def archive() -> str:
+    """Returns the path for the folder of archive shards"""
+    return os.path.join(index(), ARCHIVE)
+
+def archive_shard(year: int, month: Optional[int] = None) -> str:
+    """Returns the path for the archive of a year, or of a month if month is not None"""
+    if month is None:
+        return os.path.join(archive(), f"{year}.md")
+    return os.path.join(archive(), str(year), f"{month}.md")
+
+@cache
+def digests() -> str:
+    """Returns the path for the digests of the generated files"""
+    return os.path.join(index(), DIGESTS)
+
+@cache
+def manifest() -> str:
+    """Returns the path for the snippet manifest cache"""
+    return os.path.join(index(), MANIFEST)
+
+@cache
+def search() -> str:
+    """Returns the path for the full-text search index"""
+    return os.path.join(index(), SEARCH)
+
+@cache
+def catalog() -> str:
+    """Returns the path for the snippet catalog"""
+    return os.path.join(index(), CATALOG)
+
+@cache
+def code() -> str:
+    """Returns the path for the cache of code statistics"""
+    return os.path.join(index(), CODE)
+
 def rel(path: str, start: str) -> str:
     """Return the relative path to be used in markdown files"""
     return os.path.relpath(path, start).replace(os.path.sep, "/")
@@ -50,4 +108,30 @@ def rel(path: str, start: str) -> str:
 def snippet_path(folder_name: str, date: date) -> str:
     """Returns the absolute path for a snippet given the folder name"""
     y, m, d = date.year, date.month, date.day
-    return os.path.join(src(), str(y), str(m), str(d), folder_name)
\ No newline at end of file
+    return os.path.join(src(), str(y), str(m), str(d), folder_name)
+
+class Links:
+    """Relative paths from current_path to the folders of the repo, to be used in markdown files
+
+    The paths are computed once, so the links of every item in a file can be
+    built by concatenating strings instead of calling rel.
+    """
+    def __init__(self, current_path: str) -> None:
+        self.current_path = current_path
+        self.base = rel(base(), current_path)
+        self.index = rel(index(), current_path)
+        self.pages = rel(pages(), current_path)
+        self.src = rel(src(), current_path)
+        # from src or a folder in it, rel may not go up to src then down again
+        self._in_src = set(self.src.split("/")) <= {".", ".."}
+
+    def snippet(self, folder_name: str, date: date) -> str:
+        """Returns the relative path for a snippet given the folder name, the same as rel would"""
+        if self._in_src:
+            return rel(snippet_path(folder_name, date), self.current_path)
+        return f"{self.src}/{date.year}/{date.month}/{date.day}/{folder_name}"
+
+@cache
+def links(current_path: str) -> Links:
+    """Returns the relative paths from current_path to the folders of the repo"""
+    return Links(current_path)
\ No newline at end of file
@@ -0,0 +1,109 @@
+import argparse
+import os
+from bisect import bisect_left, bisect_right
+from datetime import date
+from heapq import merge
+from itertools import groupby, islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+import paths
+import snippets
+from snippets import Snippet
+
+class SnippetIndex:
+    """Snippets sorted from newest to oldest, with posting lists of tags for fast queries
+
+    Snippets created on the same day keep the order they are given in, so
+    snippets from snippets.get_all are in the same order as in the indexes.
+    """
+    def __init__(self, all_snippets: Iterable[Snippet]) -> None:
+        self.snippets: List[Snippet] = sorted(all_snippets, key=lambda s: s.created, reverse=True)
+        # ascending, to be searched with bisect
+        self._keys: List[int] = [-snippet.created.toordinal() for snippet in self.snippets]
+        self._drafts = bytearray(snippet.is_draft for snippet in self.snippets)
+        self._postings: Dict[str, List[int]] = {}
+        for i, snippet in enumerate(self.snippets):
+            for tag in snippet.tags:
+                self._postings.setdefault(tag, []).append(i)
+        self._sets: Dict[str, Set[int]] = {tag: set(postings) for tag, postings in self._postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.snippets)
+
+    def tags(self) -> List[str]:
+        """Returns all the tags, sorted"""
+        return sorted(self._postings)
+
+    def query(
+            self,
+            all_of: Iterable[str] = (),
+            any_of: Iterable[str] = (),
+            start: Optional[date] = None,
+            end: Optional[date] = None,
+            drafts: bool = False,
+            limit: Optional[int] = None,
+            offset: int = 0) -> List[Snippet]:
+        """Find the snippets from newest to oldest having all the tags in all_of and any of the tags in any_of
+
+        Only snippets created from start to end, inclusive, are found if they
+        are given, and drafts only if drafts is True. The first offset snippets
+        found are skipped, and at most limit are returned.
+        """
+        lo = 0 if end is None else bisect_left(self._keys, -end.toordinal())
+        hi = len(self._keys) if start is None else bisect_right(self._keys, -start.toordinal())
+        all_of, any_of = list(all_of), list(any_of)
+
+        found: Iterator[int]
+        if all_of:
+            # walk the shortest posting list and check the others
+            postings = sorted((self._postings.get(tag, []) for tag in all_of), key=len)
+            others = [self._sets.get(tag, set()) for tag in all_of]
+            found = (i for i in self._between(postings[0], lo, hi) if all(i in s for s in others))
+            if any_of:
+                optional = [self._sets.get(tag, set()) for tag in any_of]
+                found = (i for i in found if any(i in s for s in optional))
+        elif any_of:
+            merged = merge(*(self._between(self._postings.get(tag, []), lo, hi) for tag in set(any_of)))
+            found = (i for i, _ in groupby(merged))
+        else:
+            found = iter(range(lo, hi))
+
+        if not drafts:
+            found = (i for i in found if not self._drafts[i])
+        stop = None if limit is None else offset + limit
+        return [self.snippets[i] for i in islice(found, offset, stop)]
+
+    @staticmethod
+    def _between(postings: List[int], lo: int, hi: int) -> Iterator[int]:
+        start, stop = bisect_left(postings, lo), bisect_left(postings, hi)
+        return islice(postings, start, stop)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List the snippets matching tags and dates")
+    parser.add_argument("--tag", action="append", default=[], metavar="TAG",
+                        help="only list snippets with this tag, can be repeated to require several tags")
+    parser.add_argument("--any-tag", action="append", default=[], metavar="TAG",
+                        help="only list snippets with at least one of these tags, can be repeated")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, metavar="YYYY-MM-DD",
+                        help="only list snippets created on or after this date")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, metavar="YYYY-MM-DD",
+                        help="only list snippets created on or before this date")
+    parser.add_argument("--drafts", action="store_true", help="list drafts too")
+    parser.add_argument("--limit", type=int, default=20, help="maximum number of snippets (default: 20)")
+    parser.add_argument("--offset", type=int, default=0, help="number of snippets to skip (default: 0)")
+    parser.add_argument("--source", choices=["src", "catalog"], default="src",
+                        help="read the snippets from src, or from the catalog written by sync (default: src)")
+    args = parser.parse_args()
+
+    if args.source == "src" and not (args.tag or args.any_tag or args.start or args.end or args.offset):
+        # the newest snippets are found without reading the others
+        results = snippets.get_latest(args.limit, args.drafts)
+    else:
+        index = SnippetIndex(snippets.get_all(source=args.source))
+        results = index.query(args.tag, args.any_tag, args.start, args.end, args.drafts, args.limit, args.offset)
+    if not results:
+        print("No snippets found.")
+    for snippet in results:
+        readme = paths.rel(paths.snippet_path(snippet.path, snippet.created), os.getcwd())
+        print(f"{snippet.created}  {snippet.title}")
+        print(f"            {readme}/README.md")
@@ -0,0 +1,108 @@
+import importlib
+import io
+import math
+import os
+import shutil
+import tempfile
+import time
+from contextlib import redirect_stdout
+from typing import Dict, List, Sequence
+from unittest import TestCase
+from unittest.mock import patch
+
+import bench
+import paths
+import stats
+import sync
+
+# Sizes of the generated corpora. This file doesn't match test*.py so that it is
+# not run by "make test", as it takes a while. Run it with "make scale".
+SIZES = [500, 2000, 8000]
+
+# Highest growth exponents allowed, fitted over SIZES, for cost ~ size ** exponent.
+# Time is measured on a shared machine, so it is allowed more noise than the counters.
+MAX_TIME_EXPONENT = 1.3
+MAX_BYTES_EXPONENT = 1.1
+
+# Without a pagination window every page links to all the pages, so the output
+# grows as size ** 2 once the links outweigh the snippets. Over SIZES it is
+# measured around 1.3, this bound catches anything growing faster than that.
+MAX_UNWINDOWED_OUTPUT_EXPONENT = 1.6
+
+WINDOWED_BOUNDS = {
+    "seconds": MAX_TIME_EXPONENT,
+    "output_seconds": MAX_TIME_EXPONENT,
+    "bytes_read": MAX_BYTES_EXPONENT,
+    "bytes_written": MAX_BYTES_EXPONENT,
+}
+
+# The layouts synced, with the highest growth exponent of each measure
+LAYOUTS = [
+    (sync.Layout(pagination_window=3), WINDOWED_BOUNDS),
+    (sync.Layout(shard_tags=True, shard_archive="month", pagination_window=3), WINDOWED_BOUNDS),
+    # the default layout still reads and parses near-linearly
+    (sync.Layout(), {**WINDOWED_BOUNDS,
+                     "output_seconds": MAX_UNWINDOWED_OUTPUT_EXPONENT,
+                     "bytes_written": MAX_UNWINDOWED_OUTPUT_EXPONENT}),
+]
+
+def exponent(sizes: Sequence[int], costs: Sequence[float]) -> float:
+    """Fit cost = a * size ** exponent by least squares on a log-log scale, and return the exponent"""
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(cost, 1e-9)) for cost in costs]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    return (sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+            / sum((x - mean_x) ** 2 for x in xs))
+
+class ScaleSync(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.root)
+        for size in SIZES:
+            bench.generate(os.path.join(cls.root, str(size)), size, seed=size)
+
+    def setUp(self):
+        # sync points paths to the generated corpora, reset it afterwards
+        self.addCleanup(importlib.reload, paths)
+
+    def measure(self, size: int, layout: sync.Layout) -> Dict[str, float]:
+        base = os.path.join(self.root, str(size))
+        # every file is written, as by the first sync
+        shutil.rmtree(os.path.join(base, paths.INDEX), ignore_errors=True)
+        if os.path.exists(os.path.join(base, "README.md")):
+            os.remove(os.path.join(base, "README.md"))
+
+        # the paths of the previous corpus are cached
+        importlib.reload(paths)
+        with patch("paths.BASE_PATH", base), redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            sync.sync(layout=layout)
+            seconds = time.perf_counter() - start
+
+        phases = stats.current().phases
+        self.assertEqual(size, phases["discovery"]["parsed"])
+        return {
+            "seconds": seconds,
+            "output_seconds": phases["output"]["seconds"],
+            "bytes_read": sum(phase.get("bytes_read", 0) for phase in phases.values()),
+            "bytes_written": phases["output"].get("bytes_written", 0),
+        }
+
+    def assertGrowth(self, layout: sync.Layout, results: List[Dict[str, float]], metric: str, bound: float):
+        growth = exponent(SIZES, [result[metric] for result in results])
+        measured = ", ".join(f"{size}: {result[metric]:.6g}" for size, result in zip(SIZES, results))
+        self.assertLessEqual(growth, bound,
+                             f"{metric} grows as size ** {growth:.2f} with {layout} ({measured})")
+
+    def test_sync(self):
+        for layout, bounds in LAYOUTS:
+            with self.subTest(layout):
+                results = [self.measure(size, layout) for size in SIZES]
+
+                for metric, bound in bounds.items():
+                    self.assertGrowth(layout, results, metric, bound)
+
+    def test_exponent(self):
+        self.assertAlmostEqual(1, exponent([1, 10, 100], [3, 30, 300]))
+        self.assertAlmostEqual(2, exponent([1, 10, 100], [3, 300, 30000]))
@@ -0,0 +1,170 @@
+import argparse
+import math
+import os
+import re
+import sqlite3
+from collections import Counter
+from contextlib import closing
+from datetime import date
+from typing import Dict, Iterable, List, Tuple
+
+import manifest
+import paths
+import snippets
+import stats
+from snippets import Snippet
+
+# Bump this when the schema or the tokenizer changes, to rebuild the index
+VERSION = 1
+
+# Only the beginning of a README.md is indexed
+BODY_MAX_BYTES = 1024 * 1024
+
+# Term frequencies are weighted by the field a term is found in
+TITLE_WEIGHT = 3
+TAGS_WEIGHT = 3
+SUMMARY_WEIGHT = 2
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+_WORD = re.compile(r"\w+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    folder TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    created TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    is_draft INTEGER NOT NULL,
+    signature TEXT NOT NULL,
+    length REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc INTEGER NOT NULL,
+    tf REAL NOT NULL,
+    PRIMARY KEY (term, doc)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc);
+"""
+
+def update(all_snippets: Iterable[Snippet], full: bool = False) -> int:
+    """Update the search index with the snippets and return the number of snippets indexed
+
+    Only snippets whose README.md or tags changed since the last update are
+    read and indexed again, unless full is True. Snippets which no longer
+    exist are removed.
+    """
+    os.makedirs(paths.index(), exist_ok=True)
+    with closing(_connect()) as db, db:
+        if full:
+            db.executescript("DELETE FROM postings; DELETE FROM docs;")
+
+        indexed: Dict[str, str] = dict(db.execute("SELECT folder, signature FROM docs"))
+        current = set()
+        count = 0
+        for snippet in all_snippets:
+            folder = snippets.folder_of(snippet)
+            current.add(folder)
+            signature = repr(manifest.signature(folder.replace("/", os.path.sep)))
+            if indexed.get(folder) == signature:
+                continue
+            _remove(db, folder)
+            _add(db, folder, signature, snippet)
+            count += 1
+
+        for folder in indexed.keys() - current:
+            _remove(db, folder)
+
+    stats.add("indexed", count)
+    return count
+
+def search(query: str, limit: int = 10) -> List[Tuple[float, Snippet]]:
+    """Find the snippets best matching the words in query, ranked by BM25"""
+    terms = set(_tokenize(query))
+    if not terms or not os.path.exists(paths.search()):
+        return []
+
+    with closing(_connect()) as db:
+        total, average = db.execute("SELECT COUNT(*), AVG(length) FROM docs").fetchone()
+        if not total:
+            return []
+
+        scores: Counter = Counter()
+        for term in terms:
+            rows = db.execute("""SELECT postings.doc, postings.tf, docs.length
+                                 FROM postings JOIN docs ON docs.id = postings.doc
+                                 WHERE postings.term = ?""", (term,)).fetchall()
+            idf = math.log(1 + (total - len(rows) + 0.5) / (len(rows) + 0.5))
+            for doc, tf, length in rows:
+                scores[doc] += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / average))
+
+        results = []
+        for doc, score in scores.most_common(limit):
+            title, summary, created, tags, folder, is_draft = db.execute(
+                "SELECT title, summary, created, tags, folder, is_draft FROM docs WHERE id = ?", (doc,)).fetchone()
+            snippet = Snippet(title, summary, date.fromisoformat(created),
+                              frozenset(tags.split()), folder.rsplit("/", 1)[-1], bool(is_draft))
+            results.append((score, snippet))
+        return results
+
+def _connect() -> sqlite3.Connection:
+    db = sqlite3.connect(paths.search())
+    if db.execute("PRAGMA user_version").fetchone()[0] != VERSION:
+        db.executescript("DROP TABLE IF EXISTS postings; DROP TABLE IF EXISTS docs;")
+        db.execute(f"PRAGMA user_version = {VERSION}")
+    db.executescript(SCHEMA)
+    return db
+
+def _add(db: sqlite3.Connection, folder: str, signature: str, snippet: Snippet) -> None:
+    terms: Counter = Counter()
+    for weight, words in ((TITLE_WEIGHT, _tokenize(snippet.title)),
+                          (TAGS_WEIGHT, _tokenize(" ".join(snippet.tags))),
+                          (SUMMARY_WEIGHT, _tokenize(snippet.summary)),
+                          (1, _body(folder))):
+        for word in words:
+            terms[word] += weight
+
+    cursor = db.execute("INSERT INTO docs (folder, title, summary, created, tags, is_draft, signature, length) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (folder, snippet.title, snippet.summary, snippet.created.isoformat(),
+                         " ".join(sorted(snippet.tags)), snippet.is_draft, signature, sum(terms.values())))
+    db.executemany("INSERT INTO postings (term, doc, tf) VALUES (?, ?, ?)",
+                   ((term, cursor.lastrowid, tf) for term, tf in terms.items()))
+
+def _remove(db: sqlite3.Connection, folder: str) -> None:
+    row = db.execute("SELECT id FROM docs WHERE folder = ?", (folder,)).fetchone()
+    if row is not None:
+        db.execute("DELETE FROM postings WHERE doc = ?", row)
+        db.execute("DELETE FROM docs WHERE id = ?", row)
+
+def _body(folder: str) -> Iterable[str]:
+    readme = snippets.file_path(folder.replace("/", os.path.sep), "README.md")
+    try:
+        with open(readme, "rb") as file:
+            data = file.read(BODY_MAX_BYTES)
+    except FileNotFoundError:
+        return []
+    stats.add("bytes_read", len(data))
+    return _tokenize(data.decode("utf-8", errors="ignore"))
+
+def _tokenize(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search the snippets")
+    parser.add_argument("query", nargs="+", help="words to search for")
+    parser.add_argument("--limit", type=int, default=10, help="maximum number of results (default: 10)")
+    args = parser.parse_args()
+
+    results = search(" ".join(args.query), args.limit)
+    if not results:
+        print("No snippets found.")
+    for score, snippet in results:
+        readme = paths.rel(paths.snippet_path(snippet.path, snippet.created), os.getcwd())
+        print(f"{score:6.2f}  {snippet.created}  {snippet.title}")
+        print(f"        {readme}/README.md")
@@ -0,0 +1,174 @@
+import argparse
+import asyncio
+import mimetypes
+import os
+import traceback
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+import codestats
+import paths
+import sync
+import watch
+from watch import Signature
+
+
+class Site:
+    """Render the indexes on demand from the snippets in memory, caching them until their inputs change
+
+    Concurrent requests for a file which is not cached share one render.
+    """
+    def __init__(self, jobs: int = 1, layout: sync.Layout = sync.Layout()) -> None:
+        self.watcher = watch.Watcher(jobs, layout)
+        self.layout = layout
+        self.targets: sync.Targets = {}
+        self.digests: Dict[str, str] = {}
+        self._cache: Dict[str, str] = {}
+        self._pending: Dict[str, "asyncio.Task[str]"] = {}
+
+    async def refresh(self, signatures: Optional[Dict[str, Signature]] = None) -> List[str]:
+        """Re-parse the changed snippets and return the generated files whose contents changed
+
+        The src folder is scanned unless its signatures are given. The cached
+        contents of the changed files are dropped, to be rendered again when
+        they are requested.
+        """
+        loop = asyncio.get_running_loop()
+        if signatures is None:
+            signatures = await loop.run_in_executor(None, self.watcher.scan)
+        if signatures == self.watcher.signatures and self.targets:
+            return []
+        targets, digests = await loop.run_in_executor(None, self._prepare, signatures)
+
+        changed = [path for path in self.digests.keys() | digests.keys()
+                   if self.digests.get(path) != digests.get(path)]
+        self.targets, self.digests = targets, digests
+        for path in changed:
+            self._cache.pop(path, None)
+            self._pending.pop(path, None)
+        return sorted(changed)
+
+    async def get(self, path: str) -> Optional[str]:
+        """Returns the contents of the generated file at path, or None if there is no such file"""
+        cached = self._cache.get(path)
+        if cached is not None:
+            return cached
+
+        pending = self._pending.get(path)
+        if pending is None:
+            target = self.targets.get(path)
+            if target is None:
+                return None
+            pending = self._pending[path] = asyncio.create_task(self._render(path, target, self.digests[path]))
+        # a cancelled request must not cancel the render shared with other requests
+        return await asyncio.shield(pending)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one HTTP request"""
+        try:
+            request = (await reader.readline()).decode("latin-1").split()
+            while (await reader.readline()).strip():
+                # the headers are not used
+                pass
+            if len(request) != 3:
+                status, content_type, body = "400 Bad Request", "text/plain", b"Bad request"
+            elif request[0] not in ("GET", "HEAD"):
+                status, content_type, body = "405 Method Not Allowed", "text/plain", b"Method not allowed"
+            else:
+                try:
+                    status, content_type, body = await self._respond(request[1])
+                except Exception:
+                    traceback.print_exc()
+                    status, content_type, body = "500 Internal Server Error", "text/plain", b"Internal server error"
+
+            if content_type.startswith("text/"):
+                content_type += "; charset=utf-8"
+            head = (f"HTTP/1.1 {status}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    "Connection: close\r\n\r\n")
+            writer.write(head.encode("latin-1"))
+            if request[:1] != ["HEAD"]:
+                writer.write(body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _respond(self, url: str) -> Tuple[str, str, bytes]:
+        path = os.path.normpath(os.path.join(paths.base(), unquote(urlsplit(url).path).lstrip("/")))
+        if os.path.commonpath([path, paths.base()]) != paths.base():
+            return "404 Not Found", "text/plain", b"Not found"
+        if os.path.isdir(path):
+            path = os.path.join(path, "README.md")
+
+        content = await self.get(path)
+        if content is not None:
+            # markdown is shown as text by browsers
+            return "200 OK", "text/plain", content.encode("utf-8")
+
+        # only the snippets are served as they are, not the repository or what a sync left in index
+        if os.path.commonpath([path, paths.src()]) == paths.src() and os.path.isfile(path):
+            body = await asyncio.get_running_loop().run_in_executor(None, _read, path)
+            return "200 OK", mimetypes.guess_type(path)[0] or "text/plain", body
+        return "404 Not Found", "text/plain", b"Not found"
+
+    def _prepare(self, signatures: Dict[str, Signature]) -> Tuple[sync.Targets, Dict[str, str]]:
+        all_snippets = self.watcher.reload(signatures)
+        # nothing is written to disk while serving
+        code = codestats.update(all_snippets, save=False) if self.layout.code_stats else None
+        targets = sync.targets(sync.group(all_snippets), self.layout, code)
+        return targets, sync.digest_all(targets)
+
+    async def _render(self, path: str, target: "sync.partial[sync.Content]", digest: str) -> str:
+        try:
+            content = await asyncio.get_running_loop().run_in_executor(None, lambda: "".join(target()))
+        finally:
+            if self._pending.get(path) is asyncio.current_task():
+                del self._pending[path]
+        # the snippets may have changed while rendering
+        if self.digests.get(path) == digest:
+            self._cache[path] = content
+        return content
+
+async def serve(host: str = "127.0.0.1", port: int = 8000, jobs: int = 1, layout: sync.Layout = sync.Layout()) -> None:
+    """Serve the indexes and the snippets over HTTP, rendering again the files affected by changes in src"""
+    site = Site(jobs, layout)
+    await site.refresh()
+    server = await asyncio.start_server(site.handle, host, port)
+    print(f"Serving on http://{host}:{port}/, press Ctrl+C to stop...")
+    loop = asyncio.get_running_loop()
+    async with server:
+        while True:
+            await asyncio.sleep(watch.POLL_INTERVAL)
+            signatures = await loop.run_in_executor(None, site.watcher.scan)
+            if signatures == site.watcher.signatures:
+                continue
+
+            # wait for a burst of changes to settle, like watch does
+            while True:
+                await asyncio.sleep(watch.DEBOUNCE)
+                settled = await loop.run_in_executor(None, site.watcher.scan)
+                if settled == signatures:
+                    break
+                signatures = settled
+
+            changed = await site.refresh(signatures)
+            print(f"{len(changed)} files changed.")
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as file:
+        return file.read()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the indexes, rendered on demand from the snippets in src")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="port to listen on (default: 8000)")
+    parser.add_argument("--jobs", type=int, default=1, metavar="N",
+                        help="parse snippets with N threads (default: 1)")
+    sync.add_layout_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.jobs, sync.layout_from_arguments(args)))
+    except KeyboardInterrupt:
+        print("Stopped serving.")
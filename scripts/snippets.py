@@ -1,13 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import date
-from typing import FrozenSet, Iterable, Tuple
+from itertools import islice
+from typing import FrozenSet, Iterable, Iterator, List, Optional, Tuple
 from glob import glob
 import os
 
 import paths
+import stats
 
 DRAFT_TAG = "draft"
 
+# Only the beginning of a README.md is read for its title and summary
+README_MAX_BYTES = 64 * 1024
+
 @dataclass(frozen=True)
 class Snippet:
     """Represent a code snippet"""
@@ -18,55 +24,180 @@ class Snippet:
     path: str
     is_draft: bool
 
-def get_all() -> Iterable[Snippet]:
-    """Get all snippets in the repository"""
-    for snippet_folder_with_date in glob("*/*/*/*", root_dir=paths.src()):
-        year, month, day, name = snippet_folder_with_date.split(os.path.sep)
-        created = date(int(year), int(month), int(day))
+class _Skipped(Exception):
+    pass
+
+def get_all(jobs: int = 1, source: str = "src") -> Iterable[Snippet]:
+    """Get all snippets in the repository, parsed by a pool of jobs threads
+
+    If source is "catalog", the snippets are read from the catalog written
+    by the last sync instead.
+    """
+    if source == "catalog":
+        # catalog imports this module
+        import catalog
+        return catalog.get_all()
+    if source != "src":
+        raise ValueError(f"unknown source: {source}")
+    return (snippet for _, snippet in parse_all(folders(), jobs) if snippet is not None)
+
+def folders(newest_first: bool = False) -> List[str]:
+    """List snippet folders relative to the src folder, e.g. 2023/6/19/name, by date and name
+
+    If newest_first is True, the dates are from newest to oldest, with the
+    folders of each day still by name.
+    """
+    if newest_first:
+        return list(walk_newest_first())
+    return sorted(glob("*/*/*/*", root_dir=paths.src()), key=_folder_key)
+
+def walk_newest_first() -> Iterator[str]:
+    """Yield snippet folders relative to the src folder, from the newest date to the oldest and by name
+
+    The year, month and day folders are listed as they are walked, so the
+    newest folders are found without listing all the others.
+    """
+    src = paths.src()
+    for year in _numbered(src):
+        for month in _numbered(os.path.join(src, year)):
+            for day in _numbered(os.path.join(src, year, month)):
+                folder = os.path.join(year, month, day)
+                for name in sorted(os.listdir(os.path.join(src, folder))):
+                    # hidden names are not matched by folders() either
+                    if not name.startswith("."):
+                        yield os.path.join(folder, name)
+
+def get_latest(count: int, drafts: bool = False) -> List[Snippet]:
+    """Get the count newest snippets, parsing only the newest folders"""
+    found = (snippet for snippet in map(parse, walk_newest_first())
+             if snippet is not None and (drafts or not snippet.is_draft))
+    return list(islice(found, count))
+
+def parse(folder_with_date: str) -> Optional[Snippet]:
+    """Parse the snippet in a folder, or return None if it should be skipped"""
+    snippet, skipped = _parse(folder_with_date)
+    if skipped:
+        stats.add("skipped")
+        print(f"Skipping {folder_with_date}: {skipped}")
+    return snippet
+
+def parse_all(
+        folders_with_date: List[str],
+        jobs: int = 1) -> Iterable[Tuple[str, Optional[Snippet]]]:
+    """Parse snippet folders by a pool of jobs threads
+
+    The results are yielded in the order of the folders. Skipped folders are
+    reported in the same order and yielded with None.
+    """
+    if jobs <= 1:
+        for folder_with_date in folders_with_date:
+            yield folder_with_date, parse(folder_with_date)
+        return
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        results = executor.map(_parse, folders_with_date)
+        for folder_with_date, (snippet, skipped) in zip(folders_with_date, results):
+            if skipped:
+                stats.add("skipped")
+                print(f"Skipping {folder_with_date}: {skipped}")
+            yield folder_with_date, snippet
 
-        title, summary = _readme(snippet_folder_with_date)
-        if title == "":
-            continue
+def _numbered(path: str) -> List[str]:
+    # months and days are not padded, so they are sorted as numbers for 10 to come after 9
+    try:
+        with os.scandir(path) as entries:
+            # a stray file named like a number is not a date folder
+            names = [entry.name for entry in entries if entry.name.isdigit() and entry.is_dir()]
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+    return sorted(names, key=int, reverse=True)
+
+def _parse(folder_with_date: str) -> Tuple[Optional[Snippet], str]:
+    year, month, day, name = folder_with_date.split(os.path.sep)
+    created = date(int(year), int(month), int(day))
+
+    try:
+        title, summary = _readme(folder_with_date)
+    except _Skipped as skipped:
+        return None, str(skipped)
+
+    tags = frozenset(_tags(folder_with_date))
+
+    return Snippet(title, summary, created, tags, name, DRAFT_TAG in tags), ""
+
+def _folder_key(folder_with_date: str) -> Tuple[int, int, int, str]:
+    year, month, day, name = folder_with_date.split(os.path.sep)
+    return int(year), int(month), int(day), name
 
-        tags = frozenset(_tags(snippet_folder_with_date))
+def folder_of(snippet: Snippet) -> str:
+    """Returns the folder of a snippet relative to the src folder, with / as separators, e.g. 2023/6/19/name"""
+    created = snippet.created
+    return f"{created.year}/{created.month}/{created.day}/{snippet.path}"
 
-        yield Snippet(title, summary, created, tags, name, DRAFT_TAG in tags)
+def file_path(folder_with_date: str, filename: str) -> str:
+    """Returns the absolute path of a file in a snippet folder"""
+    return os.path.join(paths.src(), folder_with_date, filename)
 
 def _readme(folder_with_date: str) -> Tuple[str, str]:
-    readme = _file_path(folder_with_date, "README.md")
+    readme = file_path(folder_with_date, "README.md")
     if not os.path.exists(readme):
-        print(f"Skipping {folder_with_date}: README.md not found")
-        return ("", "")
+        raise _Skipped("README.md not found")
 
-    with open(readme, encoding="utf-8") as file:
+    # title is the first non-empty line
+    lines = list(_header(readme))
+    if not lines:
+        raise _Skipped("no title defined")
 
-        # title is the first non-empty line
-        lines = [line.strip() 
-                 for line in file.readlines() 
-                 if line != "" and not line.isspace()]
-        if not lines:
-            print(f"Skipping {folder_with_date}: no title defined")
+    title = lines[0]
+    if title.startswith("#"):
+        title = title.lstrip("#").strip()
+    if title == "":
+        raise _Skipped("no title defined")
 
-        title = lines[0]
-        if title.startswith("#"):
-            title = title.lstrip("#").strip()
+    # summary is the second non-empty line, or empty if there is no content
+    # between the title and a "---"
+    if len(lines) < 2 or lines[1] == "---":
+        return (title, "")
 
-        # summary is the second non-empty line, or empty if there is no content
-        # between the title and a "---"
-        if len(lines) < 2 or lines[1] == "---":
-            return (title, "")
+    return (title, lines[1].lstrip(">").strip())
 
-        return (title, lines[1].lstrip(">").strip())
+def _header(readme: str) -> Iterable[str]:
+    """Yield the first two non-empty lines of a README.md, stripped
+
+    The file is read line by line and reading stops at the second line, a "---"
+    or after README_MAX_BYTES bytes, whichever comes first. A line cut off by
+    the byte limit is ignored.
+    """
+    with open(readme, "rb") as file:
+        remaining = README_MAX_BYTES
+        found = 0
+        try:
+            while remaining > 0 and found < 2:
+                raw = file.readline(remaining)
+                if not raw:
+                    return
+                remaining -= len(raw)
+                if remaining == 0 and not raw.endswith(b"\n"):
+                    return
+
+                line = raw.decode("utf-8").strip()
+                if line == "":
+                    continue
+
+                yield line
+                found += 1
+                if line == "---":
+                    return
+        finally:
+            stats.add("bytes_read", README_MAX_BYTES - remaining)
 
 def _tags(folder_with_date: str) -> Iterable[str]:
-    tags = _file_path(folder_with_date, "tags")
+    tags = file_path(folder_with_date, "tags")
     if not os.path.exists(tags):
         return []
     with open(tags, encoding="utf-8") as file:
+        stats.add("bytes_read", os.fstat(file.fileno()).st_size)
         for line in file:
             line = line.strip()
             if len(line) > 0 and not line.startswith("#") and not ' ' in line:
-                yield line
-
-def _file_path(folder_with_date: str, filename: str) -> str:
-    return os.path.join(paths.src(), folder_with_date, filename)
\ No newline at end of file
+                yield line
\ No newline at end of file
@@ -0,0 +1,93 @@
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import ContextManager, Dict, Iterator, Optional
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows, where the peak memory is not reported
+    resource = None
+
+class Stats:
+    """Wall time and counters of the phases of a sync, and the peak memory of the process
+
+    Counters are added to the phase that is running, or to "other" outside
+    of any phase. Adding a counter only takes a lock, so it is cheap enough
+    to be left on.
+    """
+    def __init__(self) -> None:
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self._phase: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Measure the code run in the with block as the phase name"""
+        self._phase = name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._phase = None
+            counters = self.phases.setdefault(name, {})
+            counters["seconds"] = counters.get("seconds", 0) + time.perf_counter() - start
+
+    def add(self, counter: str, value: float = 1) -> None:
+        """Add value to a counter of the running phase"""
+        with self._lock:
+            counters = self.phases.setdefault(self._phase or "other", {})
+            counters[counter] = counters.get(counter, 0) + value
+
+    def table(self) -> str:
+        """Format the stats as a text table, followed by the peak memory of the process"""
+        rows = [("phase", "seconds", "counters")]
+        for name, counters in self.phases.items():
+            rest = " ".join(f"{key}={_format(value)}" for key, value in counters.items() if key != "seconds")
+            rows.append((name, f"{counters.get('seconds', 0):.3f}", rest))
+        widths = [max(len(row[i]) for row in rows) for i in range(2)]
+        lines = [f"{row[0]:<{widths[0]}}  {row[1]:>{widths[1]}}  {row[2]}".rstrip() for row in rows]
+        peak = peak_memory()
+        if peak is not None:
+            # the high-water mark of the whole process, as memory is not measured per phase
+            lines.append(f"peak memory of the process: {peak:.1f} MB")
+        return "\n".join(lines)
+
+    def json(self) -> str:
+        """Format the stats as JSON, with the peak memory of the process in a "process" entry"""
+        peak = peak_memory()
+        process = {} if peak is None else {"process": {"peak_memory_mb": peak}}
+        return json.dumps({**self.phases, **process}, indent=2)
+
+_current = Stats()
+
+def start() -> Stats:
+    """Start collecting a new set of stats"""
+    global _current
+    _current = Stats()
+    return _current
+
+def current() -> Stats:
+    """Returns the stats being collected"""
+    return _current
+
+def phase(name: str) -> ContextManager[None]:
+    """Measure the code run in the with block as the phase name of the current stats"""
+    return _current.phase(name)
+
+def add(counter: str, value: float = 1) -> None:
+    """Add value to a counter of the current stats"""
+    _current.add(counter, value)
+
+def peak_memory() -> Optional[float]:
+    """Returns the peak memory of the process so far in MB, or None if it is not available"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def _format(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else f"{value:.3f}"
@@ -1,89 +1,394 @@
+import argparse
+import cProfile
+import hashlib
+import json
 import os
-from functools import reduce
+import pstats
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from functools import partial
+from glob import glob
 from itertools import groupby
-from operator import itemgetter
-from typing import Iterable, List
-import shutil
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
+import catalog
+import codestats
 import gen
+import manifest
 import paths
-import snippets
-from gen import SnippetsByTag, SnippetsByYear, SnippetPage
-from snippets import Snippet
+import search
+import stats
+from output import Content, Output
+from snippets import Snippet, folder_of
 
 PAGE_SIZE = 10
 
-def sync() -> None:
-    """Synchronize the indexes"""
+# Generated file paths mapped to the calls rendering their contents
+Targets = Dict[str, "partial[Content]"]
+
+# Targets are sent to render processes in batches of this size
+RENDER_CHUNK_SIZE = 16
+
+# Marks a snippet packed into a tuple to be sent to a render process
+_PACKED_SNIPPET = "\0snippet"
+
+@dataclass(frozen=True)
+class Layout:
+    """Options for how the indexes are laid out"""
+    # split tags.md into a list of tags and paginated files per tag under index/tags
+    shard_tags: bool = False
+    # split archive.md into files per "year" or "month" under index/archive
+    shard_archive: Optional[str] = None
+    # link to the first, the last and this many pages before and after the current page,
+    # instead of to every page, so the size of a page does not grow with the number of pages
+    pagination_window: Optional[int] = None
+    # show the languages and lines of code of each snippet, and their totals in archive.md
+    code_stats: bool = False
+
+@dataclass(frozen=True)
+class Groups:
+    """Snippets grouped for the indexes, each group sorted from newest to oldest"""
+    by_year: List[Tuple[int, List[Snippet]]]
+    by_tag: List[Tuple[str, List[Snippet]]]
+    by_page: List[List[Snippet]]
+
+def sync(
+        full: bool = False,
+        check: bool = False,
+        jobs: int = 1,
+        layout: Layout = Layout(),
+        processes: int = 1) -> List[str]:
+    """Synchronize the indexes and return the list of changed files
+
+    Snippets are loaded from the manifest cache where possible, and only the
+    files whose inputs changed since the last sync are rendered, unless full is
+    True. Other snippets are parsed by a pool of jobs threads, and the files
+    are rendered by a pool of processes if it is more than 1. If check is True,
+    every file is rendered, nothing is written and the changes are only
+    reported. The time spent and the work done in each phase are collected in
+    stats.current().
+    """
+    stats.start()
+
     print("Grabbing snippets...")
-    all_snippets = sorted(snippets.get_all(), key=lambda s: s.created, reverse=True)
+    with stats.phase("discovery"):
+        # already sorted from the newest to the oldest, as the folders are walked by date
+        all_snippets = manifest.get_all(full, save=not check, jobs=jobs, newest_first=True)
     print(f"{len(all_snippets)} found.")
 
-    by_year = sorted(((year, snippets) 
-                      for year, snippets in _by_year(all_snippets)),
-                      key=itemgetter(0), reverse=True)
-    
-    by_tag = sorted(((tag, snippets)
-                     for tag, snippets in _by_tag(all_snippets)),
-                     key=itemgetter(0))
-    
-    by_page = list(page for page in 
-                   _by_page([snippet for snippet in all_snippets 
-                             if not snippet.is_draft]))
+    code = None
+    if layout.code_stats:
+        print("Counting lines of code...")
+        with stats.phase("code"):
+            code = codestats.update(all_snippets, full, save=not check, processes=processes)
 
-    print("Generating README.md...")
-    _gen_home(by_page[0], len(by_page))
+    with stats.phase("group"):
+        groups = group(all_snippets)
 
-    print("Generating pages...")
-    _gen_pages(by_page)
-    print(f"{len(by_page)} pages generated.")
+    out = Output(check)
 
-    print("Generating archive.md...")
-    _gen_archive(by_year)
+    print("Generating README.md, pages, archive.md and tags.md...")
+    with stats.phase("output"):
+        previous = {} if full or check else load_digests()
+        digests = render(out, targets(groups, layout, code), previous, processes)
+        if not check:
+            save_digests(digests)
+    print(f"{len(groups.by_page)} pages generated.")
 
-    print("Generating tags.md...")
-    _gen_tags(by_tag)
+    if not check:
+        print("Updating the catalog...")
+        with stats.phase("catalog"):
+            cataloged = catalog.update(all_snippets)
+        print(f"{cataloged} snippets cataloged.")
 
+        print("Updating the search index...")
+        with stats.phase("search"):
+            indexed = search.update(all_snippets, full)
+        print(f"{indexed} snippets indexed.")
+
+    print(f"{len(out.changes)} files changed, {out.unchanged} unchanged.")
     print("Synchonization finished.")
+    return out.changes
+
+def targets(
+        groups: Groups,
+        layout: Layout = Layout(),
+        code: Optional[Dict[Snippet, codestats.CodeStats]] = None) -> Targets:
+    """Map the path of every generated file to the call that renders it
+
+    The code statistics are shown if they are given.
+    """
+    # only the statistics of its own snippets are passed to a target, so they are part of its digest,
+    # keyed by folder as the repr of a Snippet changes with the order of its tags
+    code_of: Callable[[List[Snippet]], gen.CodeStatsBySnippet] = \
+        lambda snippets: None if code is None else {folder_of(s): code[s] for s in snippets}
+    window = layout.pagination_window
+    # without published snippets, the home page is an empty page 1
+    by_page = groups.by_page or [[]]
+    total_pages = len(by_page)
+    result: Targets = {
+        os.path.join(paths.base(), "README.md"):
+            partial(gen.stream_page, by_page[0], total_pages, 1, paths.base(), window, code_of(by_page[0]))
+    }
+
+    for i, page in enumerate(by_page):
+        result[os.path.join(paths.pages(), f"{i+1}.md")] = \
+            partial(gen.stream_page, page, total_pages, i+1, paths.pages(), window, code_of(page))
+
+    summary = None if code is None else codestats.summarize(code.values())
+    result.update(_archive_targets(groups, layout, code_of, summary))
+    if not layout.shard_tags:
+        all_tagged = [snippet for _, tagged in groups.by_tag for snippet in tagged]
+        result[os.path.join(paths.index(), "tags.md")] = \
+            partial(gen.stream_tags, groups.by_tag, code_of(all_tagged))
+        return result
+
+    result[os.path.join(paths.index(), "tags.md")] = \
+        partial(gen.gen_tag_directory, [(tag, len(tagged)) for tag, tagged in groups.by_tag])
+    for tag, tagged in groups.by_tag:
+        current_path = paths.tag_pages(tag)
+        tag_pages = [tagged[i:i+PAGE_SIZE] for i in range(0, len(tagged), PAGE_SIZE)]
+        for i, page in enumerate(tag_pages):
+            result[os.path.join(current_path, f"{i+1}.md")] = \
+                partial(gen.stream_tag_page, tag, page, len(tag_pages), i+1, current_path, window, code_of(page))
+    return result
+
+def _archive_targets(
+        groups: Groups,
+        layout: Layout,
+        code_of: Callable[[List[Snippet]], gen.CodeStatsBySnippet],
+        summary: Optional[codestats.Summary]) -> Targets:
+    archive = os.path.join(paths.index(), "archive.md")
+    if layout.shard_archive is None:
+        all_snippets = [snippet for _, snippets in groups.by_year for snippet in snippets]
+        return {archive: partial(gen.stream_archive, groups.by_year, code_of(all_snippets), summary)}
+
+    result: Targets = {}
+    shards: List[Tuple[int, List[Tuple[Optional[int], int]]]] = []
+    for year, snippets in groups.by_year:
+        if layout.shard_archive == "month":
+            months = [(month, list(group)) for month, group in groupby(snippets, key=lambda s: s.created.month)]
+        else:
+            months = [(None, snippets)]
+        for month, group in months:
+            result[paths.archive_shard(year, month)] = \
+                partial(gen.stream_archive_shard, year, month, group, code_of(group))
+        shards.append((year, [(month, len(group)) for month, group in months]))
+
+    result[archive] = partial(gen.gen_archive_directory, shards, layout.shard_archive == "month", summary)
+    return result
+
+def render(
+        out: Output,
+        targets: Targets,
+        previous: Optional[Dict[str, str]] = None,
+        processes: int = 1) -> Dict[str, str]:
+    """Render the targets into out, delete stale files and return the digests of the targets
 
-def _gen_home(snippets: SnippetPage, total_pages: int) -> None:
-    current_path = paths.base()
-    with open(os.path.join(current_path, "README.md"), "w", encoding="utf-8") as home:
-        home.write(gen.gen_page(snippets, total_pages, 1, current_path))
+    A target is skipped if its digest is the same in previous and its file
+    was not touched since, as its contents can't have changed.
+    """
+    digests = digest_all(targets)
+    stale: Targets = {}
+    for path, target in targets.items():
+        if previous and previous.get(path) == f"{digests[path]} {_file_state(path)}":
+            digests[path] = previous[path]
+        else:
+            stale[path] = target
 
-def _gen_pages(snippets: List[SnippetPage]) -> None:
-    current_path = paths.pages()
+    for path, content in render_all(stale, processes):
+        out.write(path, content)
+        stats.add("rendered")
+        digests[path] = f"{digests[path]} {_file_state(path)}"
 
-    if os.path.exists(current_path):
-        shutil.rmtree(current_path)
-    os.makedirs(current_path)
+    out.prune(paths.pages(), targets)
+    out.prune(paths.tags(), targets)
+    out.prune(paths.archive(), targets)
+    return digests
 
-    for i, page in enumerate(snippets):
-        with open(os.path.join(current_path, f"{i+1}.md"), "w", encoding="utf-8") as file:
-            file.write(gen.gen_page(page, len(snippets), i+1, current_path))
+def digest_all(targets: Targets) -> Dict[str, str]:
+    """Returns digests of the code, the templates and the arguments rendering each target
 
-def _gen_archive(snippets_by_year: SnippetsByYear) -> None:
-    with open(os.path.join(paths.index(), "archive.md"), "w", encoding="utf-8") as archive:
-        archive.write(gen.gen_archive(snippets_by_year))
+    A target renders the same contents as long as its digest is the same.
+    """
+    renderer = _renderer_digest()
+    return {path: _digest(renderer, target) for path, target in targets.items()}
 
-def _gen_tags(snippets_by_tag: SnippetsByTag) -> None:
-    with open(os.path.join(paths.index(), "tags.md"), "w", encoding="utf-8") as tags:
-        tags.write(gen.gen_tags(snippets_by_tag))
+def render_all(targets: Targets, processes: int = 1) -> Iterator[Tuple[str, Content]]:
+    """Render the targets and yield their paths and contents in order
 
-def _by_year(snippets: SnippetPage) -> SnippetsByYear:
-    for year, group in groupby(snippets, key=lambda s: s.created.year):
-        yield year, list(group)
+    Contents are strings or iterables of chunks, which are generated as they
+    are consumed so they can be streamed to the files. If processes is more
+    than 1, the targets are rendered by a pool of worker processes. The
+    snippets in their arguments are sent as plain tuples, which are much
+    cheaper to pickle than dataclasses.
+    """
+    if processes <= 1 or len(targets) <= 1:
+        for path, target in targets.items():
+            yield path, target()
+        return
 
-def _by_tag(snippets: SnippetPage) -> SnippetsByTag:
-    all_tags = reduce(lambda ts, s: ts.union(s.tags), snippets, set())
-    for tag in all_tags:
-        snippets_with_tag = [snippet for snippet in snippets 
-                             if tag in snippet.tags]
-        yield tag, snippets_with_tag
+    packed = [(target.func.__name__, _pack(target.args)) for target in targets.values()]
+    with ProcessPoolExecutor(processes, initializer=paths.init_process, initargs=(paths.base(),)) as executor:
+        yield from zip(targets, executor.map(_render_packed, packed, chunksize=RENDER_CHUNK_SIZE))
 
-def _by_page(snippets: List[Snippet]) -> Iterable[SnippetPage]:
-    for i in range(0, len(snippets), PAGE_SIZE):
-        yield snippets[i:i+PAGE_SIZE]
+def _render_packed(packed: Tuple[str, Any]) -> str:
+    name, args = packed
+    content = getattr(gen, name)(*_unpack(args))
+    # generators can't be sent back to the main process
+    return content if isinstance(content, str) else "".join(content)
+
+def _pack(value: Any) -> Any:
+    if isinstance(value, Snippet):
+        return (_PACKED_SNIPPET, value.title, value.summary, value.created.toordinal(),
+                tuple(value.tags), value.path, value.is_draft)
+    if isinstance(value, (list, tuple)):
+        return tuple(_pack(item) for item in value)
+    return value
+
+def _unpack(value: Any) -> Any:
+    if isinstance(value, tuple):
+        if value and value[0] == _PACKED_SNIPPET:
+            _, title, summary, created, tags, path, is_draft = value
+            return Snippet(title, summary, date.fromordinal(created), frozenset(tags), path, is_draft)
+        return [_unpack(item) for item in value]
+    return value
+
+def load_digests() -> Dict[str, str]:
+    """Load the digests of the targets rendered by the last sync"""
+    try:
+        with open(paths.digests(), encoding="utf-8") as file:
+            saved = json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return {os.path.join(paths.base(), path): digest for path, digest in saved.items()}
+
+def save_digests(digests: Dict[str, str]) -> None:
+    """Save the digests of the rendered targets for the next sync"""
+    os.makedirs(paths.index(), exist_ok=True)
+    temp = paths.digests() + ".tmp"
+    with open(temp, "w", encoding="utf-8") as file:
+        json.dump({os.path.relpath(path, paths.base()): digest for path, digest in digests.items()},
+                  file, separators=(",", ":"))
+    os.replace(temp, paths.digests())
+
+def _renderer_digest() -> str:
+    # the output also depends on the code and the templates rendering it
+    sha = hashlib.sha1()
+    for path in [gen.__file__, paths.__file__] + sorted(glob(os.path.join(paths.templates(), "*"))):
+        with open(path, "rb") as file:
+            sha.update(file.read())
+    return sha.hexdigest()
+
+def _file_state(path: str) -> str:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return "missing"
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+def _digest(renderer: str, target: "partial[Content]") -> str:
+    sha = hashlib.sha1(renderer.encode())
+    sha.update(target.func.__name__.encode())
+    _update_digest(sha, target.args)
+    return sha.hexdigest()
+
+def _update_digest(sha: Any, value: Any) -> None:
+    if isinstance(value, Snippet):
+        value = (value.title, value.summary, value.created.isoformat(),
+                 sorted(value.tags), value.path, value.is_draft)
+    if isinstance(value, (list, tuple)):
+        sha.update(b"(")
+        for item in value:
+            _update_digest(sha, item)
+        sha.update(b")")
+    else:
+        sha.update(repr(value).encode())
+        sha.update(b",")
+
+def add_layout_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the command line options of the Layout to parser"""
+    parser.add_argument("--shard-tags", action="store_true",
+                        help="generate paginated files per tag under index/tags, "
+                             "with tags.md only listing the tags")
+    parser.add_argument("--shard-archive", choices=["year", "month"],
+                        help="generate an archive file per year or month under index/archive, "
+                             "with archive.md only linking to them")
+    parser.add_argument("--pagination-window", type=int, metavar="N",
+                        help="link to the first, the last and N pages around the current page "
+                             "instead of to every page")
+    parser.add_argument("--code-stats", action="store_true",
+                        help="show the languages and lines of code of each snippet, "
+                             "and their totals in archive.md")
+
+def layout_from_arguments(args: argparse.Namespace) -> Layout:
+    """Returns the Layout of the options added by add_layout_arguments"""
+    return Layout(shard_tags=args.shard_tags, shard_archive=args.shard_archive,
+                  pagination_window=args.pagination_window, code_stats=args.code_stats)
+
+def group(snippets: List[Snippet]) -> Groups:
+    """Group snippets sorted from newest to oldest by year, tag and page in one pass"""
+    by_year: List[Tuple[int, List[Snippet]]] = []
+    by_tag: Dict[str, List[Snippet]] = {}
+    by_page: List[List[Snippet]] = []
+
+    for snippet in snippets:
+        year = snippet.created.year
+        if not by_year or by_year[-1][0] != year:
+            by_year.append((year, []))
+        by_year[-1][1].append(snippet)
+
+        for tag in snippet.tags:
+            by_tag.setdefault(tag, []).append(snippet)
+
+        if not snippet.is_draft:
+            if not by_page or len(by_page[-1]) == PAGE_SIZE:
+                by_page.append([])
+            by_page[-1].append(snippet)
+
+    return Groups(by_year, sorted(by_tag.items()), by_page)
 
 if __name__ == "__main__":
-    sync()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Synchronize the indexes")
+    parser.add_argument("--full", action="store_true",
+                        help="ignore the manifest cache and re-parse every snippet")
+    parser.add_argument("--check", action="store_true",
+                        help="list the files that would change without writing them, "
+                             "and exit with 1 if there are any")
+    parser.add_argument("--jobs", type=int, default=1, metavar="N",
+                        help="parse snippets with N threads (default: 1)")
+    parser.add_argument("--processes", type=int, default=1, metavar="N",
+                        help="render files with N processes, for very large corpora (default: 1)")
+    add_layout_arguments(parser)
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and regenerate the files affected by changes in src")
+    parser.add_argument("--stats", nargs="?", const="table", choices=["table", "json"],
+                        help="print the time, memory and counters of each phase")
+    parser.add_argument("--profile", action="store_true",
+                        help="run with cProfile and print the functions by cumulative time")
+    args = parser.parse_args()
+    layout = layout_from_arguments(args)
+    if args.watch:
+        import watch
+        watch.watch(jobs=args.jobs, layout=layout)
+        sys.exit(0)
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    changes = sync(full=args.full, check=args.check, jobs=args.jobs, layout=layout, processes=args.processes)
+    if profiler:
+        profiler.disable()
+        pstats.Stats(profiler).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(40)
+
+    if args.stats == "json":
+        print(stats.current().json())
+    elif args.stats:
+        print(stats.current().table())
+    if args.check and changes:
+        print("The indexes are out of date:")
+        for change in changes:
+            print(f"  {change}")
+        sys.exit(1)
\ No newline at end of file
@@ -1,8 +1,69 @@
 import os
 import shutil
+from string import Formatter
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple, Union
 
 import paths
 
+# The placeholders each template may use
+FIELDS: Dict[str, FrozenSet[str]] = {
+    "README.md": frozenset(["title", "home_link"]),
+    "archive.md": frozenset(["header", "items_by_year"]),
+    "archive_shard.md": frozenset(["period", "header", "items"]),
+    "page.md": frozenset(["header", "items", "pagination"]),
+    "tags.md": frozenset(["header", "all_tags", "items_by_tag"]),
+    "tag.md": frozenset(["tag", "header", "items", "pagination"]),
+}
+
+class Template:
+    """A template compiled into a list of literal text and placeholders"""
+    def __init__(self, name: str, text: str) -> None:
+        self.name = name
+        self.parts: List[Tuple[str, Optional[str]]] = []
+        fields = FIELDS.get(name, frozenset())
+        for literal, field, spec, conversion in Formatter().parse(text):
+            if field is not None and (field not in fields or spec or conversion):
+                raise ValueError(f"Unknown placeholder '{{{field}}}' in template '{name}'")
+            self.parts.append((literal, field))
+
+    def render(self, **values: str) -> str:
+        """Fill the placeholders with values"""
+        return "".join(literal if field is None else literal + values[field]
+                       for literal, field in self.parts)
+
+    def stream(self, **values: Union[str, Iterable[str]]) -> Iterator[str]:
+        """Fill the placeholders with values, which may be iterables of chunks, and yield the result in chunks"""
+        # an iterable can only be consumed once
+        used = Counter(field for _, field in self.parts)
+        for field, value in values.items():
+            if not isinstance(value, str) and used[field] > 1:
+                values[field] = "".join(value)
+
+        for literal, field in self.parts:
+            if literal:
+                yield literal
+            if field is None:
+                continue
+            value = values[field]
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value
+
+_compiled: Dict[str, Tuple[int, Template]] = {}
+
+def get(template_name: str) -> Template:
+    """Get a compiled template, which is loaded again only if the file changed"""
+    path = _path(template_name)
+    mtime = os.stat(path).st_mtime_ns
+    cached = _compiled.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    compiled = Template(template_name, load(template_name))
+    _compiled[path] = (mtime, compiled)
+    return compiled
 
 def load(template_name: str) -> str:
     """Read all text in a template file"""
@@ -0,0 +1,38 @@
+import importlib
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import bench
+import paths
+
+
+class TestBench(TestCase):
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base)
+        # bench points paths to the generated corpus, reset it afterwards
+        self.addCleanup(importlib.reload, paths)
+
+    def test_generate(self):
+        bench.generate(self.base, 20, seed=1)
+
+        folders = [folder for folder, _, files in os.walk(os.path.join(self.base, "src")) if "README.md" in files]
+        self.assertEqual(20, len(folders))
+
+    def test_run(self):
+        bench.generate(self.base, 50, seed=1)
+
+        result = bench.run(self.base)
+
+        self.assertEqual(50, result["snippets"])
+        self.assertEqual(["discovery", "group", "render", "write"], list(result["phases"]))
+        self.assertEqual(result["pages"] + 3, result["files_written"])
+        self.assertTrue(os.path.exists(os.path.join(self.base, "index", "tags.md")))
+
+    def test_memory(self):
+        result = bench.memory(1000, seed=1)
+
+        self.assertEqual(1000, result["snippets"])
+        self.assertLess(result["compact_mb"], result["snippet_mb"])
@@ -0,0 +1,58 @@
+import importlib
+import os
+import shutil
+import tempfile
+from datetime import date
+from unittest import TestCase
+from unittest.mock import patch
+
+import catalog
+import paths
+import snippets
+
+
+class TestCatalog(TestCase):
+    def setUp(self):
+        # Force the paths module to reload to get the patches
+        # otherwise the patches take no effect because methods in paths are cahced
+        importlib.reload(paths)
+
+        # setup:
+        # test1: 2021-6-21
+        # test2: 2021-6-22, TypeScript
+        # test3: 2022-6-21, C#, TypeScript
+        # test4: 2022-6-22, draft, Hello
+        self.base = tempfile.mkdtemp()
+        shutil.copytree(os.path.join("scripts", "test_files", "sync_test", "src"),
+                        os.path.join(self.base, "src"))
+        patcher = patch("paths.BASE_PATH", self.base)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.base)
+
+    def test_get_all(self):
+        self.assertEqual(4, catalog.update(snippets.get_all()))
+
+        self.assertEqual(list(snippets.get_all()), snippets.get_all(source="catalog"))
+        self.assertEqual(["test2", "test3"], [s.path for s in catalog.get_all(tag="TypeScript")])
+        self.assertEqual(["test3", "test4"], [s.path for s in catalog.get_all(start=date(2022, 1, 1))])
+        self.assertEqual(["test2"], [s.path for s in catalog.get_all(tag="TypeScript", end=date(2021, 12, 31))])
+        self.assertEqual([], catalog.get_all(tag="nothing"))
+
+    def test_incremental(self):
+        catalog.update(snippets.get_all())
+        self.assertEqual(0, catalog.update(snippets.get_all()))
+
+        with open(os.path.join(self.base, "src", "2021", "6", "21", "test1", "tags"), "w", encoding="utf-8") as tags:
+            tags.write("Go\n")
+        shutil.rmtree(os.path.join(self.base, "src", "2022", "6", "22", "test4"))
+
+        self.assertEqual(1, catalog.update(snippets.get_all()))
+        self.assertEqual(["test1"], [s.path for s in catalog.get_all(tag="Go")])
+        self.assertEqual(["test1", "test2", "test3"], [s.path for s in snippets.get_all(source="catalog")])
+
+    def test_missing(self):
+        with self.assertRaises(FileNotFoundError):
+            snippets.get_all(source="catalog")
+        with self.assertRaises(ValueError):
+            snippets.get_all(source="nothing")
@@ -0,0 +1,88 @@
+import importlib
+import io
+import os
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+from datetime import date
+from unittest import TestCase
+from unittest.mock import patch
+
+import codestats
+import paths
+import stats
+from codestats import CodeStats
+from snippets import Snippet
+
+
+class TestCodeStats(TestCase):
+    def setUp(self):
+        # Force the paths module to reload to get the patches
+        # otherwise the patches take no effect because methods in paths are cahced
+        importlib.reload(paths)
+
+        self.base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base)
+        patcher = patch("paths.BASE_PATH", self.base)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.snippet = Snippet("Test", "", date(2023, 6, 19), frozenset(), "test", False)
+        self.write("README.md", "# Test\n\n```cs\nvar x = 1;\n```\n")
+        self.write("tags", "csharp\n")
+        self.write("Program.cs", "using System;\n\nclass Program\n{\n}\n")
+        self.write("Lib/Lib.cs", "namespace Lib;\r\n\r\n  \r\npublic class Lib {}")
+        self.write("Lib/Lib.csproj", "<Project>\n</Project>\n")
+        self.write("Lib/.vs/Cache.cs", "ignored\n")
+
+    def write(self, name: str, text: str) -> str:
+        path = os.path.join(self.base, "src", "2023", "6", "19", "test", *name.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            file.write(text)
+        return path
+
+    def update(self, *extra: Snippet, **kwargs) -> dict:
+        stats.start()
+        with redirect_stdout(io.StringIO()):
+            return codestats.update([self.snippet, *extra], **kwargs)
+
+    def test_compute(self):
+        expected = CodeStats((("C#", 2, 6), ("MSBuild", 1, 2)))
+
+        self.assertEqual(expected, codestats.compute(os.path.join("2023", "6", "19", "test")))
+        self.assertEqual((3, 8), (expected.files, expected.lines))
+
+    def test_count_lines_chunks(self):
+        path = self.write("Long.cs", "\n".join(["a", "", "bb", " ", "", "ccc"] * 50) + "\n\n")
+
+        for size in [1, 2, 3, 7, 64 * 1024]:
+            with self.subTest(size), patch("codestats.READ_SIZE", size):
+                self.assertEqual(150, codestats.count_lines(path))
+
+    def test_update_cached(self):
+        first = self.update()
+        self.assertEqual(1, stats.current().phases["other"]["measured"])
+
+        self.assertEqual(first, self.update())
+        self.assertNotIn("measured", stats.current().phases["other"])
+
+        path = self.write("Program.cs", "class Program {}\n")
+        os.utime(path, ns=(1, 1))
+        self.assertEqual(CodeStats((("C#", 2, 3), ("MSBuild", 1, 2))), self.update()[self.snippet])
+        self.assertEqual(1, stats.current().phases["other"]["measured"])
+
+    def test_update_processes(self):
+        # a snippet without source files
+        other = Snippet("Other", "", date(2023, 6, 20), frozenset(), "other", False)
+        os.makedirs(os.path.join(self.base, "src", "2023", "6", "20", "other"))
+
+        got = self.update(other, full=True, processes=2)
+
+        self.assertEqual(self.update(other, full=True), got)
+        self.assertEqual(CodeStats(), got[other])
+
+    def test_summarize(self):
+        code = [CodeStats((("C#", 2, 6), ("MSBuild", 1, 2))), CodeStats(), CodeStats((("Go", 1, 10), ("C#", 1, 1)))]
+
+        self.assertEqual([("Go", 1, 1, 10), ("C#", 2, 3, 7), ("MSBuild", 1, 1, 2)], codestats.summarize(code))
@@ -0,0 +1,43 @@
+from datetime import date
+from unittest import TestCase
+
+import compact
+from snippets import Snippet
+
+
+class TestCompact(TestCase):
+    def setUp(self):
+        self.snippets = [
+            Snippet("Snippet 1", "Summary 1", date(2021, 7, 22), frozenset(["go", "note"]), "s1", False),
+            Snippet("Snippet 2", "Summary 2", date(2021, 7, 27), frozenset(["go", "draft"]), "s2", True),
+            Snippet("Snippet 3", "Summary 3", date(2022, 1, 1), frozenset(), "s3", False),
+            Snippet("Snippet 4", "Summary 4", date(2022, 7, 27), frozenset(["C#", "note"]), "s4", False)
+        ]
+        self.compact = compact.CompactSnippets(self.snippets)
+
+    def paths(self, items):
+        return [item.path for item in items]
+
+    def test_round_trip(self):
+        self.assertEqual(4, len(self.compact))
+        self.assertEqual(self.snippets, list(self.compact))
+        self.assertEqual(["go", "note", "draft", "C#"], self.compact.vocabulary.tags)
+
+    def test_has_tag(self):
+        first = self.compact.items[0]
+
+        self.assertTrue(self.compact.has_tag(first, "go"))
+        self.assertFalse(self.compact.has_tag(first, "C#"))
+        self.assertFalse(self.compact.has_tag(first, "unknown"))
+
+    def test_with_tags(self):
+        self.assertEqual(["s1", "s2"], self.paths(self.compact.with_tags(["go"])))
+        self.assertEqual(["s1"], self.paths(self.compact.with_tags(["go", "note"])))
+        self.assertEqual(["s1", "s2", "s4"], self.paths(self.compact.with_tags(any_of=["go", "C#"])))
+        self.assertEqual(["s1", "s4"], self.paths(self.compact.with_tags(["note"], any_of=["go", "C#"])))
+        self.assertEqual(["s1", "s2", "s3", "s4"], self.paths(self.compact.with_tags()))
+
+    def test_with_unknown_tags(self):
+        self.assertEqual([], self.paths(self.compact.with_tags(["go", "unknown"])))
+        self.assertEqual(["s1", "s2"], self.paths(self.compact.with_tags(any_of=["go", "unknown"])))
+        self.assertEqual([], self.paths(self.compact.with_tags(any_of=["unknown"])))
@@ -4,6 +4,7 @@ from unittest import TestCase
 
 import gen
 import paths
+from codestats import CodeStats
 from snippets import Snippet
 
 
@@ -37,6 +38,19 @@ class TestGen(TestCase):
             got = gen.gen_archive(snippets).strip()
             self.assertEqual(got, expected)
 
+    def test_gen_archive_code(self):
+        s1 = Snippet("Snippet 1", "Summary 1", date(2021, 7, 22), frozenset(["Hello"]), "s1", False)
+        s2 = Snippet("Snippet 2", "Summary 2", date(2021, 7, 27), frozenset(["Hello"]), "s2", True)
+        s3 = Snippet("Snippet 3", "Summary 3", date(2022, 7, 22), frozenset(["Hello"]), "s3", False)
+        code = {"2021/7/22/s1": CodeStats((("C#", 2, 120), ("MSBuild", 1, 10))), "2021/7/27/s2": CodeStats(),
+                "2022/7/22/s3": CodeStats((("Go", 1, 1),))}
+        summary = [("C#", 1, 2, 120), ("MSBuild", 1, 1, 10), ("Go", 1, 1, 1)]
+
+        with open(os.path.join(os.path.dirname(__file__), "test_files", "gen_test", "archive_code.md"), encoding="utf-8") as file:
+            expected = file.read().strip()
+            got = gen.gen_archive([(2021, [s1, s2]), (2022, [s3])], code, summary).strip()
+            self.assertEqual(got, expected)
+
     def test_gen_tag(self):
         snippets = [
             ("hello", [
@@ -51,4 +65,61 @@ class TestGen(TestCase):
         with open(os.path.join(os.path.dirname(__file__), "test_files", "gen_test", "tags.md"), encoding="utf-8") as file:
             expected = file.read().strip()
             got = gen.gen_tags(snippets).strip()
-            self.assertEqual(got, expected)
\ No newline at end of file
+            self.assertEqual(got, expected)
+
+    def test_gen_tag_page(self):
+        snippets = [
+            Snippet("Snippet 1", "Summary 1", date(2021, 7, 22), frozenset(["C#", "hello"]), "s1", False),
+            Snippet("Snippet 2", "Summary 2", date(2021, 7, 27), frozenset(["C#"]), "s2", True)
+        ]
+
+        with open(os.path.join(os.path.dirname(__file__), "test_files", "gen_test", "tag_page.md"), encoding="utf-8") as file:
+            expected = file.read().strip()
+            got = gen.gen_tag_page("C#", snippets, 2, 1, paths.tag_pages("C#")).strip()
+            self.assertEqual(got, expected)
+
+    def test_gen_tag_directory(self):
+        with open(os.path.join(os.path.dirname(__file__), "test_files", "gen_test", "tag_directory.md"), encoding="utf-8") as file:
+            expected = file.read().strip()
+            got = gen.gen_tag_directory([("C#", 2), ("hello", 1)]).strip()
+            self.assertEqual(got, expected)
+
+    def test_gen_archive_shard(self):
+        snippets = [
+            Snippet("Snippet 1", "Summary 1", date(2021, 7, 27), frozenset(["hello"]), "s1", False),
+            Snippet("Snippet 2", "Summary 2", date(2021, 7, 22), frozenset(["hello"]), "s2", True)
+        ]
+
+        with open(os.path.join(os.path.dirname(__file__), "test_files", "gen_test", "archive_shard.md"), encoding="utf-8") as file:
+            expected = file.read().strip()
+            got = gen.gen_archive_shard(2021, 7, snippets).strip()
+            self.assertEqual(got, expected)
+
+    def test_gen_archive_directory(self):
+        with open(os.path.join(os.path.dirname(__file__), "test_files", "gen_test", "archive_directory.md"), encoding="utf-8") as file:
+            expected = file.read().strip()
+            got = gen.gen_archive_directory([(2022, [(1, 1)]), (2021, [(7, 2), (6, 1)])], True).strip()
+            self.assertEqual(got, expected)
+
+    def test_gen_pagination_window(self):
+        links = gen._gen_pagination(20, 10, paths.pages(), window=2).split(" | ")
+
+        self.assertEqual(["[Newer](./9.md)", "[1](./1.md)", "...", "[8](./8.md)", "[9](./9.md)", "10",
+                          "[11](./11.md)", "[12](./12.md)", "...", "[20](./20.md)", "[Older](./11.md)"], links)
+        self.assertEqual("1 | [2](./2.md) | [3](./3.md) | ... | [20](./20.md) | [Older](./2.md)",
+                         gen._gen_pagination(20, 1, paths.pages(), window=2))
+        self.assertEqual("[Newer](./1.md) | [1](./1.md) | 2 | [3](./3.md) | [4](./4.md) | [Older](./3.md)",
+                         gen._gen_pagination(4, 2, paths.pages(), window=2))
+
+    def test_gen_pagination_size(self):
+        def average_size(total_pages: int, window=None) -> float:
+            return sum(len(gen._gen_pagination(total_pages, i, paths.pages(), window=window))
+                       for i in range(1, total_pages + 1)) / total_pages
+
+        # with a window, the pagination of a page only grows with the digits of the page numbers
+        for total_pages in (10, 100, 1000):
+            self.assertLess(average_size(total_pages, window=2), 200)
+        self.assertLess(average_size(1000, window=2), 2 * average_size(10, window=2))
+
+        # linking to every page grows with the number of pages
+        self.assertGreater(average_size(300), 20 * average_size(10))
@@ -0,0 +1,95 @@
+import importlib
+import io
+import os
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+from unittest import TestCase
+from unittest.mock import patch
+
+import linkcheck
+import paths
+import sync
+
+
+class TestLinkCheck(TestCase):
+    def setUp(self):
+        # Force the paths module to reload to get the patches
+        # otherwise the patches take no effect because methods in paths are cahced
+        importlib.reload(paths)
+
+        self.base = tempfile.mkdtemp()
+        patcher = patch("paths.BASE_PATH", self.base)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.base)
+
+        self.write("README.md", "[Archive](index/archive.md) | [Tags](index/tags.md)\n")
+        self.write("index/archive.md", "[Home](../README.md)\n")
+        self.write("index/tags.md", "# Tags\n\n## Go\n\n## Go\n\n## Type Script!\n")
+        self.write("src/2023/6/19/hello/main.go", "")
+
+    def write(self, path: str, text: str) -> str:
+        path = os.path.join(self.base, *path.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(text)
+        return path
+
+    def broken(self):
+        return [(paths.rel(b.source, self.base), b.line, b.target, b.reason) for b in linkcheck.check(jobs=4)]
+
+    def test_no_broken_links(self):
+        self.write("src/2023/6/19/hello/README.md",
+                   "# Hello\n\n[main](./main.go), ![image](main.go \"title\") [home][1]\n\n"
+                   "[Go](../../../../../index/tags.md#go) [Go again](../../../../../index/tags.md#go-1)\n"
+                   "[TypeScript](../../../../../index/tags.md#Type-Script) [top](#hello)\n"
+                   "[site](https://github.com) [mail](mailto:someone@example.com)\n\n"
+                   "[1]: ../../../../../README.md\n")
+
+        self.assertEqual([], self.broken())
+
+    def test_broken_links(self):
+        self.write("src/2023/6/19/hello/README.md",
+                   "# Hello\n\n[missing](./missing.go)\n\n"
+                   "```md\n[in code](./ignored.go)\n```\n"
+                   "`[inline code](./ignored.go)` [tag](../../../../../index/tags.md#python)\n"
+                   "[escaped](../../../../../index/tags%2Emd) [self](#nothing)\n")
+        self.write("index/pages/1.md", "[Home](../../README.md) [Older](./2.md)\n")
+
+        self.assertEqual([
+            ("index/pages/1.md", 1, "./2.md", "not found"),
+            ("src/2023/6/19/hello/README.md", 3, "./missing.go", "not found"),
+            ("src/2023/6/19/hello/README.md", 8, "../../../../../index/tags.md#python", "anchor not found"),
+            ("src/2023/6/19/hello/README.md", 9, "#nothing", "anchor not found")
+        ], self.broken())
+
+    def test_cache(self):
+        checker = linkcheck.LinkChecker()
+        files = [self.write(f"index/pages/{i}.md", "[Home](../../README.md#nothing)\n") for i in range(1, 10)]
+
+        with patch("os.path.exists", wraps=os.path.exists) as exists:
+            self.assertEqual(9, len(checker.check(files)))
+
+        exists.assert_called_once()
+
+class TestLinkCheckSync(TestCase):
+    def setUp(self):
+        # Force the paths module to reload to get the patches
+        # otherwise the patches take no effect because methods in paths are cahced
+        importlib.reload(paths)
+
+        self.base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base)
+        shutil.copytree(os.path.join("scripts", "test_files", "sync_test", "src"),
+                        os.path.join(self.base, "src"))
+        for patcher in [patch("paths.BASE_PATH", self.base), patch("sync.PAGE_SIZE", 2)]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_synced_links(self):
+        for layout in [sync.Layout(), sync.Layout(shard_tags=True, shard_archive="month", pagination_window=1)]:
+            with self.subTest(layout), redirect_stdout(io.StringIO()):
+                sync.sync(layout=layout)
+
+                self.assertEqual([], linkcheck.check(jobs=4))
@@ -0,0 +1,89 @@
+import importlib
+import os
+import shutil
+import tempfile
+from datetime import date
+from unittest import TestCase
+from unittest.mock import patch
+
+import manifest
+import paths
+import snippets
+
+
+class TestManifest(TestCase):
+    def setUp(self):
+        # Force the paths module to reload to get the patches
+        # otherwise the patches take no effect because methods in paths are cahced
+        importlib.reload(paths)
+
+        self.base = tempfile.mkdtemp()
+        shutil.copytree(os.path.join("scripts", "test_files", "snippet_test", "src"),
+                        os.path.join(self.base, "src"))
+        patcher = patch("paths.BASE_PATH", self.base)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.base)
+
+    def test_get_all(self):
+        first = manifest.get_all()
+
+        self.assertEqual(set(first), set(snippets.get_all()))
+        self.assertTrue(os.path.exists(paths.manifest()))
+
+    def test_unchanged_folders_are_loaded_from_cache(self):
+        first = manifest.get_all()
+
+        with patch("snippets.parse") as parse:
+            second = manifest.get_all()
+            parse.assert_not_called()
+
+        self.assertEqual(set(first), set(second))
+
+    def test_touched_folders_are_not_parsed(self):
+        manifest.get_all()
+        readme = os.path.join(self.base, "src", "2023", "6", "19", "test_snippet_1", "README.md")
+        os.utime(readme, ns=(0, 0))
+
+        with patch("snippets.parse") as parse:
+            manifest.get_all()
+            parse.assert_not_called()
+
+    def test_modified_folders_are_parsed(self):
+        manifest.get_all()
+        readme = os.path.join(self.base, "src", "2023", "6", "19", "test_snippet_1", "README.md")
+        with open(readme, "w", encoding="utf-8") as file:
+            file.write("# Modified\n\nNew summary\n")
+
+        got = manifest.get_all()
+
+        self.assertIn(snippets.Snippet("Modified", "New summary", date(2023, 6, 19), frozenset(), "test_snippet_1", False), got)
+        self.assertEqual(3, len(got))
+
+    def test_skipped_folders_are_not_parsed_again(self):
+        folder = os.path.join(self.base, "src", "2023", "6", "21", "not_a_snippet")
+        os.makedirs(folder)
+        self.assertEqual(3, len(manifest.get_all()))
+
+        with patch("snippets.parse") as parse:
+            self.assertEqual(3, len(manifest.get_all()))
+            parse.assert_not_called()
+
+        with open(os.path.join(folder, "README.md"), "w", encoding="utf-8") as file:
+            file.write("# Now a snippet\n")
+        self.assertEqual(4, len(manifest.get_all()))
+
+    def test_deleted_folders_are_dropped(self):
+        manifest.get_all()
+        shutil.rmtree(os.path.join(self.base, "src", "2023", "6", "20"))
+
+        got = manifest.get_all()
+
+        self.assertEqual({"test_snippet_1", "test_snippet_2"}, {s.path for s in got})
+
+    def test_full(self):
+        manifest.get_all()
+
+        with patch("snippets.parse", wraps=snippets.parse) as parse:
+            manifest.get_all(full=True)
+            self.assertEqual(3, parse.call_count)
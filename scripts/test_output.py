@@ -0,0 +1,164 @@
+import importlib
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+import output
+import paths
+from output import Output
+
+
+class TestOutput(TestCase):
+    def setUp(self):
+        # Force the paths module to reload to get the patches
+        # otherwise the patches take no effect because methods in paths are cahced
+        importlib.reload(paths)
+
+        self.base = tempfile.mkdtemp()
+        patcher = patch("paths.BASE_PATH", self.base)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.base)
+
+    def read(self, *parts: str) -> str:
+        with open(os.path.join(self.base, *parts), encoding="utf-8") as file:
+            return file.read()
+
+    def test_write(self):
+        path = os.path.join(self.base, "index", "archive.md")
+        out = Output()
+
+        out.write(path, "hello")
+
+        self.assertEqual("hello", self.read("index", "archive.md"))
+        self.assertEqual(["create index/archive.md"], out.changes)
+        self.assertEqual(["archive.md"], os.listdir(os.path.join(self.base, "index")))
+
+    def test_write_unchanged(self):
+        path = os.path.join(self.base, "README.md")
+        Output().write(path, "hello")
+        os.utime(path, ns=(0, 0))
+        out = Output()
+
+        out.write(path, "hello")
+
+        self.assertEqual([], out.changes)
+        self.assertEqual(1, out.unchanged)
+        self.assertEqual(0, os.stat(path).st_mtime_ns)
+
+    def test_write_changed(self):
+        path = os.path.join(self.base, "README.md")
+        Output().write(path, "hello")
+        out = Output()
+
+        out.write(path, "world")
+
+        self.assertEqual("world", self.read("README.md"))
+        self.assertEqual(["update README.md"], out.changes)
+
+    def test_write_closes_before_replace(self):
+        path = os.path.join(self.base, "README.md")
+        Output().write(path, "hello world")
+        opened = []
+        real_open, real_replace = output._open, os.replace
+
+        def replace(src: str, dst: str) -> None:
+            # the existing file can't be renamed over while it is open on Windows
+            self.assertTrue(opened[0].closed)
+            real_replace(src, dst)
+
+        with patch("output._open", side_effect=lambda p: opened.append(real_open(p)) or opened[-1]), \
+                patch("os.replace", side_effect=replace) as replaced:
+            Output().write(path, iter(["hello", " there"]))
+
+        self.assertEqual(1, replaced.call_count)
+        self.assertEqual("hello there", self.read("README.md"))
+
+    def test_write_error(self):
+        path = os.path.join(self.base, "index", "archive.md")
+
+        # the file doesn't exist, then the temp file can't be created
+        with patch("output.open", create=True, side_effect=[FileNotFoundError(), PermissionError("denied")]), \
+                self.assertRaisesRegex(PermissionError, "denied"):
+            Output().write(path, "hello")
+
+        self.assertEqual([], os.listdir(os.path.join(self.base, "index")))
+
+    def test_write_chunks(self):
+        path = os.path.join(self.base, "README.md")
+        out = Output()
+
+        out.write(path, iter(["hel", "lo"]))
+
+        self.assertEqual("hello", self.read("README.md"))
+        self.assertEqual(["create README.md"], out.changes)
+
+    def test_write_chunks_unchanged(self):
+        path = os.path.join(self.base, "README.md")
+        Output().write(path, "hello\nworld")
+        os.utime(path, ns=(0, 0))
+        out = Output()
+
+        out.write(path, ["hel", "", "lo\n", "world"])
+
+        self.assertEqual([], out.changes)
+        self.assertEqual(0, os.stat(path).st_mtime_ns)
+
+    def test_write_chunks_changed(self):
+        path = os.path.join(self.base, "README.md")
+        cases = [
+            (["hel", "lp", " world"], "hellp world"),
+            (["hello", " world", "!"], "hello world!"),
+            (["hello"], "hello"),
+            (["", "bye"], "bye"),
+            ([], "")
+        ]
+        for chunks, expected in cases:
+            with self.subTest(expected):
+                Output().write(path, "hello world")
+                out = Output()
+
+                out.write(path, iter(chunks))
+
+                self.assertEqual(expected, self.read("README.md"))
+                self.assertEqual(["update README.md"], out.changes)
+
+    def test_write_chunks_check(self):
+        path = os.path.join(self.base, "README.md")
+        Output().write(path, "hello")
+        out = Output(check=True)
+
+        out.write(path, ["hel", "p"])
+
+        self.assertEqual("hello", self.read("README.md"))
+        self.assertEqual(["update README.md"], out.changes)
+
+    def test_prune(self):
+        pages = os.path.join(self.base, "index", "pages")
+        out = Output()
+        for i in range(1, 4):
+            out.write(os.path.join(pages, f"{i}.md"), str(i))
+        out = Output()
+
+        out.prune(pages, [os.path.join(pages, "1.md"), os.path.join(pages, "2.md")])
+
+        self.assertEqual(["1.md", "2.md"], sorted(os.listdir(pages)))
+        self.assertEqual(["delete index/pages/3.md"], out.changes)
+
+    def test_check(self):
+        path = os.path.join(self.base, "README.md")
+        Output().write(path, "hello")
+        pages = os.path.join(self.base, "index", "pages")
+        Output().write(os.path.join(pages, "1.md"), "1")
+        out = Output(check=True)
+
+        out.write(path, "world")
+        out.write(os.path.join(self.base, "index", "tags.md"), "tags")
+        out.prune(pages, [])
+
+        self.assertEqual(["update README.md", "create index/tags.md", "delete index/pages/1.md"], out.changes)
+        self.assertEqual("hello", self.read("README.md"))
+        self.assertFalse(os.path.exists(os.path.join(self.base, "index", "tags.md")))
+        self.assertTrue(os.path.exists(os.path.join(pages, "1.md")))
@@ -27,3 +27,16 @@ class TestPaths(TestCase):
         ]
         for path, start, expected in cases:
             self.assertEqual(expected, paths.rel(path, start))
+
+    @patch("paths.BASE_PATH", os.path.join("/", "base"))
+    def test_links(self):
+        created = date(1994, 1, 1)
+        snippet = paths.snippet_path("hello", created)
+        for current_path in [paths.base(), paths.index(), paths.pages(), paths.tag_pages("C#"),
+                             paths.archive_shard(1994, 1), paths.src(), os.path.dirname(snippet), snippet,
+                             os.path.join("/", "elsewhere")]:
+            links = paths.links(current_path)
+            self.assertEqual(paths.rel(paths.base(), current_path), links.base)
+            self.assertEqual(paths.rel(paths.index(), current_path), links.index)
+            self.assertEqual(paths.rel(paths.pages(), current_path), links.pages)
+            self.assertEqual(paths.rel(snippet, current_path), links.snippet("hello", created), current_path)
@@ -0,0 +1,53 @@
+import random
+from datetime import date, timedelta
+from itertools import product
+from unittest import TestCase
+
+from query import SnippetIndex
+from snippets import Snippet
+
+
+class TestQuery(TestCase):
+    def setUp(self):
+        rand = random.Random(42)
+        all_tags = ["go", "csharp", "typescript", "note"]
+        self.snippets = []
+        for i in range(200):
+            created = date(2020, 1, 1) + timedelta(days=rand.randrange(1000))
+            tags = frozenset(rand.sample(all_tags, rand.randrange(3)))
+            self.snippets.append(Snippet(f"Snippet {i}", f"Summary {i}", created, tags, f"s{i}", rand.random() < 0.1))
+        # in folder order, like snippets.get_all
+        self.snippets.sort(key=lambda s: (s.created, s.path))
+        self.index = SnippetIndex(self.snippets)
+
+    def brute_force(self, all_of=(), any_of=(), start=None, end=None, drafts=False):
+        # the order of sync: newest first, same-day snippets in folder order
+        ordered = sorted(self.snippets, key=lambda s: s.created, reverse=True)
+        return [s for s in ordered
+                if all(tag in s.tags for tag in all_of)
+                and (not any_of or any(tag in s.tags for tag in any_of))
+                and (start is None or s.created >= start)
+                and (end is None or s.created <= end)
+                and (drafts or not s.is_draft)]
+
+    def test_query(self):
+        tag_sets = [(), ("go",), ("go", "note"), ("unknown",), ("csharp", "unknown")]
+        dates = [None, date(2021, 1, 1), date(2021, 12, 31)]
+        for all_of, any_of, start, end, drafts in product(tag_sets, tag_sets, dates, dates, [False, True]):
+            with self.subTest(all_of=all_of, any_of=any_of, start=start, end=end, drafts=drafts):
+                self.assertEqual(self.brute_force(all_of, any_of, start, end, drafts),
+                                 self.index.query(all_of, any_of, start, end, drafts))
+
+    def test_limit(self):
+        everything = self.index.query(["go"])
+
+        self.assertEqual(everything[:5], self.index.query(["go"], limit=5))
+        self.assertEqual(everything[5:10], self.index.query(["go"], limit=5, offset=5))
+        self.assertEqual([], self.index.query(["go"], offset=len(everything)))
+
+    def test_same_day(self):
+        same_day = [Snippet("A", "", date(2021, 1, 1), frozenset(), "a", False),
+                    Snippet("B", "", date(2021, 1, 1), frozenset(), "b", False),
+                    Snippet("C", "", date(2021, 1, 2), frozenset(), "c", False)]
+
+        self.assertEqual(["c", "a", "b"], [s.path for s in SnippetIndex(same_day).query()])
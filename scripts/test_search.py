@@ -0,0 +1,74 @@
+import importlib
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+import paths
+import search
+import snippets
+
+
+class TestSearch(TestCase):
+    def setUp(self):
+        # Force the paths module to reload to get the patches
+        # otherwise the patches take no effect because methods in paths are cahced
+        importlib.reload(paths)
+
+        # setup:
+        # test1: 2021-6-21
+        # test2: 2021-6-22, TypeScript
+        # test3: 2022-6-21, C#, TypeScript
+        # test4: 2022-6-22, draft, Hello
+        self.base = tempfile.mkdtemp()
+        shutil.copytree(os.path.join("scripts", "test_files", "sync_test", "src"),
+                        os.path.join(self.base, "src"))
+        patcher = patch("paths.BASE_PATH", self.base)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.base)
+
+    def readme(self, *parts: str) -> str:
+        return os.path.join(self.base, "src", *parts, "README.md")
+
+    def test_search(self):
+        self.assertEqual(4, search.update(snippets.get_all()))
+
+        self.assertEqual(["test3"], [s.path for _, s in search.search("test3")])
+        self.assertEqual({"test2", "test3"}, {s.path for _, s in search.search("typescript")})
+        self.assertEqual(4, len(search.search("summary")))
+        self.assertEqual(2, len(search.search("summary", limit=2)))
+        self.assertEqual([], search.search("nothing"))
+        self.assertEqual([], search.search(""))
+
+    def test_ranking(self):
+        with open(self.readme("2021", "6", "21", "test1"), "a", encoding="utf-8") as readme:
+            readme.write("\nSomething about TypeScript\n")
+        search.update(snippets.get_all())
+
+        # a tag weighs more than a mention in the body
+        self.assertEqual(["test2", "test3", "test1"], [s.path for _, s in search.search("typescript")])
+
+    def test_body(self):
+        with open(self.readme("2021", "6", "21", "test1"), "a", encoding="utf-8") as readme:
+            readme.write("\nSomething about goroutines\n")
+        search.update(snippets.get_all())
+
+        self.assertEqual(["test1"], [s.path for _, s in search.search("goroutines")])
+
+    def test_incremental(self):
+        search.update(snippets.get_all())
+        self.assertEqual(0, search.update(snippets.get_all()))
+
+        with open(self.readme("2021", "6", "21", "test1"), "w", encoding="utf-8") as readme:
+            readme.write("# Renamed\n\nAbout channels\n")
+        shutil.rmtree(os.path.join(self.base, "src", "2022", "6", "22", "test4"))
+
+        self.assertEqual(1, search.update(snippets.get_all()))
+        self.assertEqual(["test1"], [s.path for _, s in search.search("channels")])
+        self.assertEqual([], search.search("test1"))
+        self.assertEqual([], search.search("hello"))
+        self.assertEqual({"test2", "test3"}, {s.path for _, s in search.search("summary second line")})
+
+        self.assertEqual(3, search.update(snippets.get_all(), full=True))
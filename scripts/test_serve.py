@@ -0,0 +1,147 @@
+import asyncio
+import importlib
+import io
+import os
+import shutil
+import tempfile
+from contextlib import redirect_stderr, redirect_stdout
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import paths
+import sync
+from serve import Site
+
+
+class TestServe(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        # Force the paths module to reload to get the patches
+        # otherwise the patches take no effect because methods in paths are cahced
+        importlib.reload(paths)
+
+        # setup:
+        # test1: 2021-6-21, page 2
+        # test2: 2021-6-22, TypeScript, page 1
+        # test3: 2022-6-21, C#, TypeScript, page 1
+        # test4: 2022-6-22, draft, Hello
+        self.base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base)
+        shutil.copytree(os.path.join("scripts", "test_files", "sync_test", "src"),
+                        os.path.join(self.base, "src"))
+        for patcher in [patch("paths.BASE_PATH", self.base), patch("sync.PAGE_SIZE", 2)]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.site = Site()
+        with redirect_stdout(io.StringIO()):
+            await self.site.refresh()
+
+    def path(self, *parts: str) -> str:
+        return os.path.join(self.base, *parts)
+
+    def count_renders(self, path: str) -> list:
+        renders = []
+        target = self.site.targets[path]
+        self.site.targets[path] = lambda: renders.append(path) or target()
+        return renders
+
+    async def test_get_like_sync(self):
+        with redirect_stdout(io.StringIO()):
+            sync.sync()
+
+        for path in ["README.md", "index/pages/1.md", "index/pages/2.md", "index/archive.md", "index/tags.md"]:
+            with self.subTest(path), open(self.path(*path.split("/")), encoding="utf-8") as file:
+                self.assertEqual(file.read(), await self.site.get(self.path(*path.split("/"))))
+        self.assertIsNone(await self.site.get(self.path("index", "pages", "3.md")))
+
+    async def test_get_renders_once(self):
+        readme = self.path("README.md")
+        renders = self.count_renders(readme)
+
+        got = await asyncio.gather(*(self.site.get(readme) for _ in range(5)))
+        got.append(await self.site.get(readme))
+
+        self.assertEqual(1, len(renders))
+        self.assertEqual(1, len(set(got)))
+
+    async def test_refresh_invalidates_affected(self):
+        for path in self.site.targets:
+            await self.site.get(path)
+        with open(self.path("src", "2021", "6", "21", "test1", "tags"), "a", encoding="utf-8") as tags:
+            tags.write("\ngo\n")
+
+        with redirect_stdout(io.StringIO()):
+            changed = await self.site.refresh()
+
+        self.assertEqual([self.path("index", "archive.md"), self.path("index", "pages", "2.md"),
+                          self.path("index", "tags.md")], changed)
+        self.assertIn("`go`", await self.site.get(self.path("index", "tags.md")))
+        renders = self.count_renders(self.path("README.md"))
+        await self.site.get(self.path("README.md"))
+        self.assertEqual([], renders)
+
+    async def test_refresh_source_with_code_stats(self):
+        source = self.path("src", "2022", "6", "21", "test3", "Program.cs")
+        with open(source, "w", encoding="utf-8") as file:
+            file.write("class Program\n{\n}\n")
+        site = Site(layout=sync.Layout(code_stats=True))
+        with redirect_stdout(io.StringIO()):
+            await site.refresh()
+
+            with open(source, "a", encoding="utf-8") as file:
+                file.write("// one more line\n")
+            changed = await site.refresh()
+
+        self.assertIn(self.path("index", "archive.md"), changed)
+        self.assertIn("| C# | 1 | 1 | 4 |", await site.get(self.path("index", "archive.md")))
+
+    async def test_refresh_unchanged(self):
+        self.assertEqual([], await self.site.refresh())
+
+    async def test_http(self):
+        server = await asyncio.start_server(self.site.handle, "127.0.0.1", 0)
+        self.addAsyncCleanup(server.wait_closed)
+        self.addCleanup(server.close)
+        port = server.sockets[0].getsockname()[1]
+
+        async def request(line: str) -> bytes:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(f"{line}\r\nHost: localhost\r\n\r\n".encode())
+            response = await reader.read()
+            writer.close()
+            await writer.wait_closed()
+            return response
+
+        readme = await self.site.get(self.path("README.md"))
+        for url in ["/", "/README.md", "/index/pages/1.md"]:
+            with self.subTest(url):
+                response = await request(f"GET {url} HTTP/1.1")
+                self.assertTrue(response.startswith(b"HTTP/1.1 200 OK\r\n"))
+                self.assertIn(b"Content-Type: text/plain; charset=utf-8\r\n", response)
+        self.assertTrue((await request("GET / HTTP/1.1")).endswith(readme.encode("utf-8")))
+        self.assertTrue((await request("GET /src/2021/6/21/test1/README.md HTTP/1.1")).startswith(b"HTTP/1.1 200 OK"))
+        self.assertTrue((await request("HEAD / HTTP/1.1")).endswith(b"\r\n\r\n"))
+        self.assertTrue((await request("GET /index/pages/3.md HTTP/1.1")).startswith(b"HTTP/1.1 404"))
+        self.assertTrue((await request("GET /../README.md HTTP/1.1")).startswith(b"HTTP/1.1 404"))
+        self.assertTrue((await request("POST / HTTP/1.1")).startswith(b"HTTP/1.1 405"))
+
+        # only the files in src are served besides the generated ones
+        for path in [("Makefile",), (".git", "config"), ("scripts", "sync.py")]:
+            os.makedirs(self.path(*path[:-1]), exist_ok=True)
+            with open(self.path(*path), "w", encoding="utf-8") as file:
+                file.write("secret\n")
+            with self.subTest(path):
+                self.assertTrue((await request(f"GET /{'/'.join(path)} HTTP/1.1")).startswith(b"HTTP/1.1 404"))
+
+        with open(self.path("src", "2021", "6", "21", "test1", "image.png"), "wb") as image:
+            image.write(b"\x89PNG")
+        response = await request("GET /src/2021/6/21/test1/image.png HTTP/1.1")
+        self.assertIn(b"Content-Type: image/png\r\n", response)
+        self.assertTrue(response.endswith(b"\x89PNG"))
+
+        def fail():
+            raise ValueError("render failed")
+        self.site.targets[self.path("index", "tags.md")] = fail
+        with redirect_stderr(io.StringIO()) as stderr:
+            self.assertTrue((await request("GET /index/tags.md HTTP/1.1")).startswith(b"HTTP/1.1 500"))
+        self.assertIn("render failed", stderr.getvalue())
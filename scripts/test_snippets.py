@@ -1,5 +1,9 @@
 import importlib
+import io
 import os
+import shutil
+import tempfile
+from contextlib import redirect_stdout
 from datetime import date
 from unittest import TestCase
 from unittest.mock import patch
@@ -25,4 +29,95 @@ class TestSnippets(TestCase):
         got = list(snippets.get_all())
 
         self.assertEqual(set(got), set(expected))
-        
+
+    @patch("paths.BASE_PATH", os.path.join("scripts", "test_files", "snippet_test"))
+    def test_get_all_jobs(self):
+        expected = list(snippets.get_all())
+
+        got = list(snippets.get_all(jobs=4))
+
+        self.assertEqual(expected, got)
+        self.assertEqual(["test_snippet_1", "test_snippet_2", "test_snippet_3"], [s.path for s in got])
+
+    def test_get_all_jobs_skipped(self):
+        base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base)
+        for day in range(1, 30):
+            os.makedirs(os.path.join(base, "src", "2023", "6", str(day), "no_readme"))
+
+        with patch("paths.BASE_PATH", base):
+            expected = io.StringIO()
+            with redirect_stdout(expected):
+                self.assertEqual([], list(snippets.get_all()))
+
+            got = io.StringIO()
+            with redirect_stdout(got):
+                self.assertEqual([], list(snippets.get_all(jobs=4)))
+
+        self.assertEqual(expected.getvalue(), got.getvalue())
+        self.assertIn(f"Skipping {os.path.join('2023', '6', '2', 'no_readme')}: README.md not found\n"
+                      f"Skipping {os.path.join('2023', '6', '3', 'no_readme')}: README.md not found\n",
+                      got.getvalue())
+
+    def test_folders_newest_first(self):
+        base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base)
+        for folder in ["2022/12/1/b", "2022/12/1/a", "2023/9/30/a", "2023/10/2/a", "2023/10/10/a", "2023/10/10/B"]:
+            os.makedirs(os.path.join(base, "src", *folder.split("/")))
+            with open(os.path.join(base, "src", *folder.split("/"), "README.md"), "w", encoding="utf-8") as readme:
+                readme.write(f"# {folder}\n")
+        os.makedirs(os.path.join(base, "src", "2023", "10", "10", ".hidden"))
+        # stray files named like dates
+        for stray in [("2024",), ("2023", "11"), ("2023", "10", "11")]:
+            with open(os.path.join(base, "src", *stray), "w", encoding="utf-8"):
+                pass
+
+        with patch("paths.BASE_PATH", base):
+            folders = snippets.folders(newest_first=True)
+            latest = snippets.get_latest(3)
+
+        self.assertEqual([os.path.join(*folder.split("/")) for folder in
+                          ["2023/10/10/B", "2023/10/10/a", "2023/10/2/a", "2023/9/30/a", "2022/12/1/a", "2022/12/1/b"]],
+                         folders)
+        self.assertEqual(["2023/10/10/B", "2023/10/10/a", "2023/10/2/a"], [s.title for s in latest])
+
+    @patch("paths.BASE_PATH", os.path.join("scripts", "test_files", "sync_test"))
+    def test_folders_newest_first_like_sort(self):
+        # the order of sorting all the snippets by date, which keeps the snippets of a day in folder order
+        expected = sorted(snippets.folders(), key=lambda folder: snippets._folder_key(folder)[:3], reverse=True)
+
+        self.assertEqual(expected, snippets.folders(newest_first=True))
+        self.assertEqual(["test3"], [s.path for s in snippets.get_latest(1)])
+        self.assertEqual(["test4", "test3"], [s.path for s in snippets.get_latest(2, drafts=True)])
+
+    def test_readme(self):
+        base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base)
+
+        def write(name: str, content: str) -> str:
+            folder = os.path.join(base, "src", "2023", "6", "19", name)
+            os.makedirs(folder)
+            with open(os.path.join(folder, "README.md"), "w", encoding="utf-8") as file:
+                file.write(content)
+            return name
+
+        cases = [
+            (write("empty", ""), None),
+            (write("blank", "\n  \n\t\n"), None),
+            (write("empty_title", "#\n\nSummary\n"), None),
+            (write("title_only", "# Title"), ("Title", "")),
+            (write("separator", "# Title\n\n---\nBody"), ("Title", "")),
+            (write("huge", "# Title\n\n> Summary\n\n" + "x" * 1024 * 1024 * 4 + "\n"), ("Title", "Summary")),
+            (write("huge_line", "y" * 1024 * 1024 * 4), None),
+            (write("after_limit", "\n" * (snippets.README_MAX_BYTES - 2) + "# Title\nSummary\n"), None),
+        ]
+
+        with patch("paths.BASE_PATH", base):
+            for name, expected in cases:
+                with self.subTest(name), redirect_stdout(io.StringIO()) as output:
+                    snippet = snippets.parse(os.path.join("2023", "6", "19", name))
+                    if expected is None:
+                        self.assertIsNone(snippet)
+                        self.assertIn("no title defined", output.getvalue())
+                    else:
+                        self.assertEqual(expected, (snippet.title, snippet.summary))
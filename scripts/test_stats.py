@@ -0,0 +1,65 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+import stats
+
+
+class TestStats(TestCase):
+    def test_phase(self):
+        s = stats.Stats()
+
+        with s.phase("discovery"):
+            s.add("parsed", 2)
+            s.add("parsed")
+        s.add("written")
+
+        self.assertEqual(3, s.phases["discovery"]["parsed"])
+        self.assertGreaterEqual(s.phases["discovery"]["seconds"], 0)
+        self.assertEqual({"written": 1}, s.phases["other"])
+
+    def test_add_from_threads(self):
+        s = stats.Stats()
+
+        with s.phase("discovery"), ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _: s.add("bytes_read", 10), range(1000)))
+
+        self.assertEqual(10000, s.phases["discovery"]["bytes_read"])
+
+    def test_current(self):
+        first = stats.start()
+        stats.add("rendered")
+
+        second = stats.start()
+
+        self.assertIs(second, stats.current())
+        self.assertEqual({"other": {"rendered": 1}}, first.phases)
+        self.assertEqual({}, second.phases)
+
+    def test_format(self):
+        s = stats.Stats()
+        with s.phase("output"):
+            s.add("written", 3)
+
+        table = s.table().splitlines()
+
+        self.assertEqual(2 if stats.peak_memory() is None else 3, len(table))
+        self.assertTrue(table[0].startswith("phase"))
+        self.assertTrue(table[1].startswith("output"))
+        self.assertIn("written=3", table[1])
+        self.assertEqual(3, json.loads(s.json())["output"]["written"])
+
+    def test_peak_memory(self):
+        s = stats.Stats()
+        with s.phase("discovery"):
+            pass
+        with s.phase("output"):
+            pass
+
+        # the peak memory is of the whole process, so it is not reported per phase
+        self.assertEqual({"seconds"}, set(s.phases["discovery"]))
+        if stats.peak_memory() is None:
+            self.assertNotIn("process", json.loads(s.json()))
+        else:
+            self.assertGreater(json.loads(s.json())["process"]["peak_memory_mb"], 0)
+            self.assertTrue(s.table().splitlines()[-1].startswith("peak memory of the process: "))
@@ -1,11 +1,22 @@
 import importlib
 import os
+import random
 import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import date, timedelta
+from functools import reduce
+from itertools import groupby
+from operator import itemgetter
 from unittest import TestCase
 from unittest.mock import patch
 
 import paths
+import stats
 import sync
+from output import Output
+from snippets import Snippet
 
 
 class TestSync(TestCase):
@@ -34,6 +45,11 @@ class TestSync(TestCase):
 
             sync.sync()
 
+            # collect stats
+            discovery = stats.current().phases["discovery"]
+            self.assertEqual(4, discovery["parsed"])
+            self.assertEqual(5, stats.current().phases["output"]["written"])
+
             # generate README.md
             with open(os.path.join(base, "README.md"), encoding="utf-8") as readme:
                 text = readme.read()
@@ -102,4 +118,235 @@ class TestSync(TestCase):
             if os.path.exists(os.path.join(base, "index")):
                 shutil.rmtree(os.path.join(base, "index"))
             if os.path.exists(os.path.join(base, "README.md")):
-                os.remove(os.path.join(base, "README.md"))
\ No newline at end of file
+                os.remove(os.path.join(base, "README.md"))
+
+    @patch("paths.BASE_PATH", os.path.join("scripts", "test_files", "sync_test"))
+    @patch("sync.PAGE_SIZE", 2)
+    def test_sync_check(self):
+        base = os.path.join("scripts", "test_files", "sync_test")
+        try:
+            changes = sync.sync(check=True)
+
+            # nothing is written in check mode
+            self.assertIn("create README.md", changes)
+            self.assertFalse(os.path.exists(os.path.join(base, "README.md")))
+            self.assertFalse(os.path.exists(os.path.join(base, "index")))
+
+            sync.sync()
+            self.assertEqual([], sync.sync(check=True))
+
+            # stale pages are reported
+            with patch("sync.PAGE_SIZE", 10):
+                changes = sync.sync(check=True)
+                self.assertIn("delete index/pages/2.md", changes)
+                self.assertNotIn("update index/archive.md", changes)
+
+        finally:
+            if os.path.exists(os.path.join(base, "index")):
+                shutil.rmtree(os.path.join(base, "index"))
+            if os.path.exists(os.path.join(base, "README.md")):
+                os.remove(os.path.join(base, "README.md"))
+
+    @patch("sync.PAGE_SIZE", 3)
+    def test_group(self):
+        rand = random.Random(42)
+        all_tags = ["go", "csharp", "typescript", "python", "note", "draft"]
+        all_snippets = []
+        for i in range(100):
+            created = date(2020, 1, 1) + timedelta(days=rand.randrange(1000))
+            tags = frozenset(rand.sample(all_tags, rand.randrange(4)))
+            all_snippets.append(Snippet(f"Snippet {i}", f"Summary {i}", created, tags, f"s{i}", "draft" in tags))
+        all_snippets.sort(key=lambda s: s.created, reverse=True)
+
+        # the grouping as it was implemented with one scan per group and tag
+        by_year = sorted(((year, list(group))
+                          for year, group in groupby(all_snippets, key=lambda s: s.created.year)),
+                         key=itemgetter(0), reverse=True)
+        tags = reduce(lambda ts, s: ts.union(s.tags), all_snippets, set())
+        by_tag = sorted(((tag, [s for s in all_snippets if tag in s.tags]) for tag in tags),
+                        key=itemgetter(0))
+        published = [s for s in all_snippets if not s.is_draft]
+        by_page = [published[i:i+3] for i in range(0, len(published), 3)]
+
+        groups = sync.group(all_snippets)
+
+        self.assertEqual(by_year, groups.by_year)
+        self.assertEqual(by_tag, groups.by_tag)
+        self.assertEqual(by_page, groups.by_page)
+
+    def test_sync_drafts_only(self):
+        base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base)
+        shutil.copytree(os.path.join("scripts", "test_files", "sync_test", "src", "2022", "6", "22", "test4"),
+                        os.path.join(base, "src", "2022", "6", "22", "test4"))
+
+        with patch("paths.BASE_PATH", base):
+            sync.sync()
+
+        # the home page is an empty first page
+        for path in ["README.md", os.path.join("index", "pages", "1.md")]:
+            with open(os.path.join(base, path), encoding="utf-8") as page:
+                self.assertNotIn("test4", page.read())
+        self.assertFalse(os.path.exists(os.path.join(base, "index", "pages", "2.md")))
+        with open(os.path.join(base, "index", "archive.md"), encoding="utf-8") as archive:
+            self.assertIn("[test4]", archive.read())
+
+    @patch("paths.BASE_PATH", os.path.join("scripts", "test_files", "sync_test"))
+    @patch("sync.PAGE_SIZE", 2)
+    def test_render_all_processes(self):
+        rand = random.Random(42)
+        all_snippets = [Snippet(f"Snippet {i}", f"Summary {i}", date(2020, 1, 1) + timedelta(days=rand.randrange(1000)),
+                                frozenset(rand.sample(["go", "C#", "draft"], rand.randrange(3))), f"s{i}", False)
+                        for i in range(50)]
+        all_snippets.sort(key=lambda s: s.created, reverse=True)
+        targets = sync.targets(sync.group(all_snippets), sync.Layout(shard_tags=True, shard_archive="month"))
+
+        serial = [(path, "".join(content)) for path, content in sync.render_all(targets)]
+        parallel = list(sync.render_all(targets, processes=2))
+
+        self.assertEqual(list(targets), [path for path, _ in parallel])
+        self.assertEqual(serial, parallel)
+
+    @patch("sync.PAGE_SIZE", 1)
+    def test_streamed_output(self):
+        # the files generated before rendering was streamed
+        expected_dir = os.path.join("scripts", "test_files", "stream_test")
+        layouts = {"default": sync.Layout(),
+                   "sharded": sync.Layout(shard_tags=True, shard_archive="month", pagination_window=1)}
+        for name, layout in layouts.items():
+            with self.subTest(name):
+                importlib.reload(paths)
+                base = tempfile.mkdtemp()
+                self.addCleanup(shutil.rmtree, base)
+                shutil.copytree(os.path.join("scripts", "test_files", "sync_test", "src"), os.path.join(base, "src"))
+
+                with patch("paths.BASE_PATH", base):
+                    sync.sync(layout=layout)
+
+                expected = os.path.join(expected_dir, name)
+                for folder, _, files in os.walk(expected):
+                    for file in files:
+                        path = os.path.relpath(os.path.join(folder, file), expected)
+                        with open(os.path.join(expected, path), encoding="utf-8") as want, \
+                                open(os.path.join(base, path), encoding="utf-8") as got:
+                            self.assertEqual(want.read(), got.read(), path)
+                generated = [os.path.join(folder, file) for folder, _, files in os.walk(os.path.join(base, "index"))
+                             for file in files if file.endswith(".md")]
+                self.assertEqual(sum(len(files) for _, _, files in os.walk(expected)), len(generated) + 1)
+
+    @patch("sync.PAGE_SIZE", 1)
+    def test_sync_shard_tags(self):
+        base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base)
+        shutil.copytree(os.path.join("scripts", "test_files", "sync_test", "src"), os.path.join(base, "src"))
+        layout = sync.Layout(shard_tags=True)
+
+        def sync_and_get_rendered():
+            with patch.object(Output, "write", autospec=True, side_effect=Output.write) as write:
+                sync.sync(layout=layout)
+            return {paths.rel(call.args[1], base) for call in write.call_args_list}
+
+        with patch("paths.BASE_PATH", base):
+            sync_and_get_rendered()
+
+            with open(os.path.join(base, "index", "tags.md"), encoding="utf-8") as tags:
+                text = tags.read()
+                self.assertContainsInOrder(text,
+                                           "## C#", "[1 snippet](tags/C%2523/1.md)",
+                                           "## TypeScript", "[2 snippets](tags/TypeScript/1.md)")
+                self.assertNotIn("[test3]", text)
+
+            with open(os.path.join(base, "index", "tags", "TypeScript", "2.md"), encoding="utf-8") as page:
+                text = page.read()
+                self.assertContainsInOrder(text, "# Tag `TypeScript`", "[test2]", "[Newer](./1.md)")
+                self.assertNotIn("[test3]", text)
+            self.assertTrue(os.path.exists(os.path.join(base, "index", "tags", "C%23", "1.md")))
+
+            # nothing changed
+            self.assertEqual(set(), sync_and_get_rendered())
+
+            # only the shards of the changed tags are rendered again
+            with open(os.path.join(base, "src", "2021", "6", "21", "test1", "tags"), "a", encoding="utf-8") as tags:
+                tags.write("\nHello\n")
+            self.assertEqual({"index/pages/3.md", "index/archive.md", "index/tags.md",
+                              "index/tags/Hello/1.md", "index/tags/Hello/2.md"},
+                             sync_and_get_rendered())
+
+            # tags which are gone are deleted
+            shutil.rmtree(os.path.join(base, "src", "2022", "6", "21", "test3"))
+            sync.sync(layout=layout)
+            self.assertFalse(os.path.exists(os.path.join(base, "index", "tags", "C%23")))
+            self.assertFalse(os.path.exists(os.path.join(base, "index", "tags", "TypeScript", "2.md")))
+
+            # tags.md lists the snippets again without shards
+            sync.sync()
+            self.assertFalse(os.path.exists(os.path.join(base, "index", "tags")))
+
+    def test_sync_shard_archive(self):
+        base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base)
+        shutil.copytree(os.path.join("scripts", "test_files", "sync_test", "src"), os.path.join(base, "src"))
+        layout = sync.Layout(shard_archive="month")
+
+        def sync_and_get_rendered():
+            with patch.object(Output, "write", autospec=True, side_effect=Output.write) as write:
+                sync.sync(layout=layout)
+            return {paths.rel(call.args[1], base) for call in write.call_args_list}
+
+        with patch("paths.BASE_PATH", base):
+            sync_and_get_rendered()
+
+            with open(os.path.join(base, "index", "archive.md"), encoding="utf-8") as archive:
+                text = archive.read()
+                self.assertContainsInOrder(text, "## 2022", "- [June](archive/2022/6.md) (2 snippets)",
+                                           "## 2021", "- [June](archive/2021/6.md) (2 snippets)")
+                self.assertNotIn("[test1]", text)
+
+            with open(os.path.join(base, "index", "archive", "2021", "6.md"), encoding="utf-8") as shard:
+                text = shard.read()
+                self.assertContainsInOrder(text, "# Archive: June 2021", "[test2]", "[test1]")
+                self.assertNotIn("[test3]", text)
+
+            # only the shard of the changed month is rendered again
+            with open(os.path.join(base, "src", "2021", "6", "21", "test1", "tags"), "a", encoding="utf-8") as tags:
+                tags.write("\nHello\n")
+            self.assertEqual({"README.md", "index/pages/1.md", "index/archive/2021/6.md", "index/tags.md"},
+                             sync_and_get_rendered())
+
+            # a generated file changed by hand is rendered again
+            with open(os.path.join(base, "index", "archive.md"), "w", encoding="utf-8") as archive:
+                archive.write("edited")
+            self.assertEqual({"index/archive.md"}, sync_and_get_rendered())
+
+            # shards of the other layout are deleted
+            layout = sync.Layout(shard_archive="year")
+            sync.sync(layout=layout)
+            self.assertTrue(os.path.exists(os.path.join(base, "index", "archive", "2021.md")))
+            self.assertFalse(os.path.exists(os.path.join(base, "index", "archive", "2021")))
+
+            layout = sync.Layout()
+            sync.sync(layout=layout)
+            self.assertFalse(os.path.exists(os.path.join(base, "index", "archive")))
+
+    def test_sync_code_stats_incremental(self):
+        base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base)
+        shutil.copytree(os.path.join("scripts", "test_files", "sync_test", "src"), os.path.join(base, "src"))
+        with open(os.path.join(base, "src", "2022", "6", "21", "test3", "tags"), "a", encoding="utf-8") as tags:
+            tags.write("".join(f"\ntag{i}" for i in range(10)))
+        with open(os.path.join(base, "src", "2022", "6", "21", "test3", "Program.cs"), "w", encoding="utf-8") as code:
+            code.write("class Program {}\n")
+
+        def sync_and_count_rendered(seed: str) -> int:
+            # a new process for each sync, as the order of the tags of a snippet changes with the hash seed
+            script = ("import paths, stats, sync; paths.BASE_PATH = sys.argv[1]; "
+                      "sync.sync(layout=sync.Layout(code_stats=True)); "
+                      "print(stats.current().phases['output'].get('rendered', 0))")
+            result = subprocess.run([sys.executable, "-c", f"import sys; {script}", base],
+                                    cwd=os.path.dirname(__file__), env={**os.environ, "PYTHONHASHSEED": seed},
+                                    capture_output=True, text=True, check=True)
+            return int(result.stdout.splitlines()[-1])
+
+        self.assertEqual(4, sync_and_count_rendered("1"))
+        self.assertEqual(0, sync_and_count_rendered("2"))
+        self.assertEqual(0, sync_and_count_rendered("3"))
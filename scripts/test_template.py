@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+import template
+
+
+class TestTemplate(TestCase):
+    def setUp(self):
+        self.templates = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.templates)
+        patcher = patch("paths.templates", return_value=self.templates)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write(self, name: str, text: str, mtime_ns: int) -> None:
+        path = os.path.join(self.templates, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    def test_render(self):
+        text = "# Code Comments\n\n{header}\n\n{{literal}}\n\n{items}\n\n{pagination}"
+        self.write("page.md", text, 1)
+
+        got = template.get("page.md").render(header="h", items="i", pagination="p")
+
+        self.assertEqual(text.format(header="h", items="i", pagination="p"), got)
+
+    def test_stream(self):
+        self.write("page.md", "{items}\n\n{pagination}\n\n{items}", 1)
+
+        chunks = template.get("page.md").stream(items=iter(["a", "b"]), pagination="p")
+
+        self.assertEqual("ab\n\np\n\nab", "".join(chunks))
+
+    def test_templates_compile(self):
+        with patch("paths.templates", return_value=os.path.join(os.path.dirname(__file__), "templates")):
+            for name in template.FIELDS:
+                with self.subTest(name):
+                    template.get(name)
+
+    def test_unknown_placeholder(self):
+        for text in ["{header} {unknown}", "{header} {}", "{header!r}", "{header:>10}", "{header"]:
+            with self.subTest(text):
+                self.write("page.md", text, 2)
+                with self.assertRaises(ValueError):
+                    template.get("page.md")
+
+    def test_cache(self):
+        self.write("archive.md", "{header}", 3)
+        first = template.get("archive.md")
+
+        self.assertIs(first, template.get("archive.md"))
+
+        self.write("archive.md", "{items_by_year}", 4)
+        second = template.get("archive.md")
+
+        self.assertIsNot(first, second)
+        self.assertEqual("items", second.render(header="header", items_by_year="items"))
@@ -0,0 +1,120 @@
+import importlib
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+import paths
+import search
+import sync
+from output import Output
+from watch import Watcher
+
+
+class TestWatch(TestCase):
+    def setUp(self):
+        # Force the paths module to reload to get the patches
+        # otherwise the patches take no effect because methods in paths are cahced
+        importlib.reload(paths)
+
+        # setup:
+        # test1: 2021-6-21, page 2
+        # test2: 2021-6-22, TypeScript, page 1
+        # test3: 2022-6-21, C#, TypeScript, page 1
+        # test4: 2022-6-22, draft, Hello
+        self.base = tempfile.mkdtemp()
+        shutil.copytree(os.path.join("scripts", "test_files", "sync_test", "src"),
+                        os.path.join(self.base, "src"))
+        for patcher in [patch("paths.BASE_PATH", self.base), patch("sync.PAGE_SIZE", 2)]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.base)
+
+        self.watcher = Watcher()
+        self.watcher.update(self.watcher.scan())
+
+    def update(self):
+        with patch.object(Output, "write", autospec=True, side_effect=Output.write) as write:
+            changes = self.watcher.update(self.watcher.scan())
+        rendered = {paths.rel(call.args[1], self.base) for call in write.call_args_list}
+        return set(changes), rendered
+
+    def snippet_file(self, *parts: str) -> str:
+        return os.path.join(self.base, "src", *parts)
+
+    def test_initial(self):
+        for path in ["README.md", "index/pages/1.md", "index/pages/2.md", "index/archive.md", "index/tags.md"]:
+            self.assertTrue(os.path.exists(os.path.join(self.base, path)), path)
+
+    def test_no_changes(self):
+        self.assertEqual((set(), set()), self.update())
+
+    def test_edit_tags(self):
+        with open(self.snippet_file("2021", "6", "21", "test1", "tags"), "a", encoding="utf-8") as tags:
+            tags.write("\ngo\n")
+
+        changes, rendered = self.update()
+
+        self.assertEqual({"update index/pages/2.md", "update index/archive.md", "update index/tags.md"}, changes)
+        self.assertEqual({"index/pages/2.md", "index/archive.md", "index/tags.md"}, rendered)
+
+    def test_edit_draft(self):
+        with open(self.snippet_file("2022", "6", "22", "test4", "README.md"), "w", encoding="utf-8") as readme:
+            readme.write("# test4\n\nNew summary\n")
+
+        changes, rendered = self.update()
+
+        # the summary is shown on pages only, and drafts are not on pages
+        self.assertEqual(set(), changes)
+        self.assertEqual({"index/archive.md", "index/tags.md"}, rendered)
+
+    def test_new_snippet(self):
+        os.makedirs(self.snippet_file("2023", "1", "1", "test5"))
+        with open(self.snippet_file("2023", "1", "1", "test5", "README.md"), "w", encoding="utf-8") as readme:
+            readme.write("# test5\n")
+
+        changes, _ = self.update()
+
+        self.assertEqual({"update README.md",
+                          "update index/pages/1.md",
+                          "update index/pages/2.md",
+                          "update index/archive.md"}, changes)
+
+    def test_search_updated(self):
+        os.makedirs(self.snippet_file("2023", "1", "1", "test5"))
+        with open(self.snippet_file("2023", "1", "1", "test5", "README.md"), "w", encoding="utf-8") as readme:
+            readme.write("# test5\n\nAbout zeppelins\n")
+
+        self.update()
+
+        self.assertEqual(["test5"], [snippet.path for _, snippet in search.search("zeppelins")])
+
+    def test_delete_snippet(self):
+        shutil.rmtree(self.snippet_file("2021", "6", "21", "test1"))
+
+        changes, _ = self.update()
+
+        self.assertEqual({"update README.md",
+                          "update index/pages/1.md",
+                          "delete index/pages/2.md",
+                          "update index/archive.md"}, changes)
+
+    def test_edit_source_with_code_stats(self):
+        source = self.snippet_file("2022", "6", "21", "test3", "Program.cs")
+        with open(source, "w", encoding="utf-8") as file:
+            file.write("class Program\n{\n}\n")
+        self.watcher = Watcher(layout=sync.Layout(code_stats=True))
+        self.watcher.update(self.watcher.scan())
+
+        with open(source, "a", encoding="utf-8") as file:
+            file.write("// one more line\n")
+        # run only updates the indexes when the scan changes
+        self.assertNotEqual(self.watcher.signatures, self.watcher.scan())
+        changes, _ = self.update()
+
+        # the lines of code are shown on the pages and tags of the snippet too
+        self.assertEqual({"update README.md", "update index/pages/1.md",
+                          "update index/archive.md", "update index/tags.md"}, changes)
+        with open(os.path.join(self.base, "index", "archive.md"), encoding="utf-8") as archive:
+            self.assertIn("| C# | 1 | 1 | 4 |", archive.read())
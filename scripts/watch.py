@@ -0,0 +1,103 @@
+import time
+from typing import Dict, List, Union
+
+import catalog
+import codestats
+import manifest
+import search
+import snippets
+import sync
+from output import Output
+from snippets import Snippet
+
+# Seconds between two scans of the src folder
+POLL_INTERVAL = 1.0
+
+# Seconds the src folder has to stay unchanged before the indexes are regenerated
+DEBOUNCE = 0.5
+
+# The files of a snippet folder the indexes depend on
+Signature = Union[manifest.Signature, codestats.Signature]
+
+class Watcher:
+    """Keep the parsed snippets in memory and regenerate the indexes affected by changes"""
+    def __init__(self, jobs: int = 1, layout: sync.Layout = sync.Layout()) -> None:
+        self.jobs = jobs
+        self.layout = layout
+        self.signatures: Dict[str, Signature] = {}
+        self.snippets: Dict[str, Snippet] = {}
+        self.digests: Dict[str, str] = {}
+
+    def scan(self) -> Dict[str, Signature]:
+        """Returns the signatures of all snippet folders
+
+        With code statistics, the signatures cover every file in the folders,
+        as editing a source file changes the statistics.
+        """
+        if self.layout.code_stats:
+            return {folder: codestats.signature(folder) for folder in snippets.folders()}
+        return {folder: manifest.signature(folder) for folder in snippets.folders()}
+
+    def update(self, signatures: Dict[str, Signature]) -> List[str]:
+        """Re-parse the folders whose signature changed and regenerate the affected files
+
+        Returns the list of changed files.
+        """
+        all_snippets = self.reload(signatures)
+        code = codestats.update(all_snippets) if self.layout.code_stats else None
+        out = Output()
+        self.digests = sync.render(out, sync.targets(sync.group(all_snippets), self.layout, code), self.digests)
+        sync.save_digests(self.digests)
+        catalog.update(all_snippets)
+        search.update(all_snippets)
+        return out.changes
+
+    def reload(self, signatures: Dict[str, Signature]) -> List[Snippet]:
+        """Re-parse the folders whose signature changed and return all snippets from newest to oldest"""
+        changed = [folder for folder, signature in signatures.items()
+                   if self.signatures.get(folder) != signature]
+        for folder, snippet in snippets.parse_all(changed, self.jobs):
+            if snippet is None:
+                self.snippets.pop(folder, None)
+            else:
+                self.snippets[folder] = snippet
+
+        # keep the folder order, so snippets created on the same day are sorted like in sync
+        self.snippets = {folder: self.snippets[folder]
+                         for folder in signatures if folder in self.snippets}
+        self.signatures = signatures
+
+        return sorted(self.snippets.values(), key=lambda s: s.created, reverse=True)
+
+    def run(self, interval: float = POLL_INTERVAL, debounce: float = DEBOUNCE) -> None:
+        """Poll the src folder and regenerate the indexes until interrupted"""
+        _report(self.update(self.scan()))
+        print("Watching for changes, press Ctrl+C to stop...")
+
+        while True:
+            time.sleep(interval)
+            signatures = self.scan()
+            if signatures == self.signatures:
+                continue
+
+            # wait for a burst of changes to settle, e.g. an editor saving several files
+            while True:
+                time.sleep(debounce)
+                settled = self.scan()
+                if settled == signatures:
+                    break
+                signatures = settled
+
+            _report(self.update(signatures))
+
+def watch(jobs: int = 1, layout: sync.Layout = sync.Layout()) -> None:
+    """Regenerate the indexes whenever snippets change, until interrupted"""
+    try:
+        Watcher(jobs, layout).run()
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+
+def _report(changes: List[str]) -> None:
+    for change in changes:
+        print(f"  {change}")
+    print(f"{time.strftime('%H:%M:%S')} {len(changes)} files changed.")